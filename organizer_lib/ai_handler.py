@@ -1,20 +1,75 @@
+import io
 import json
 import re
-import datetime
+import hashlib
+import functools
+import threading
+import importlib.util
 from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed  # lets us ask about several images at once
 from rich.console import Console
-from groq import Groq
+import httpx
+from groq import Groq, RateLimitError
 
-from .config import GROQ_KEY, IMAGE_EXTENSIONS, VISION_MODEL, TEXT_MODEL
-from .utils import get_season
+from .config import GROQ_KEY, IMAGE_EXTENSIONS, VISION_MODEL, TEXT_MODEL, VISION_CONCURRENCY, TEXT_CONCURRENCY, HIGH_CONFIDENCE_THRESHOLD, API_MAX_RETRIES
+from .utils import get_year_season, is_screenshot, load_thumbnail
 from .cache import AICache, PatternRules  # import new cache and pattern matching
+from . import jsonio
 
 console = Console()
+_log_state = threading.local()  # a background prefetch collects its messages here instead of printing over the review screen
+
+def _print(*args, **kwargs):
+    """console.print, unless this thread's messages are being held for later"""
+    held = getattr(_log_state, "held", None)
+    if held is None:
+        console.print(*args, **kwargs)
+    else:
+        held.append((args, kwargs))  # save it to show when the user gets to these files
+
+def _keep_log(fn):
+    """Wrap fn so a worker thread handles messages the same way as the thread that started it"""
+    held = getattr(_log_state, "held", None)
+    def run(*args):
+        _log_state.held = held
+        try:
+            return fn(*args)
+        finally:
+            _log_state.held = None
+    return run
+
+def analyze_files_held(files_metadata, series_tracker=None, category_tracker=None, memory_tracker=None):
+    """analyze_files_with_ai for background threads: returns (results, messages); show them later with show_messages"""
+    _log_state.held = []
+    try:
+        return analyze_files_with_ai(files_metadata, series_tracker, category_tracker, memory_tracker), _log_state.held
+    finally:
+        _log_state.held = None
+
+def show_messages(messages):
+    """Print messages that were held back by analyze_files_held"""
+    for args, kwargs in messages:
+        console.print(*args, **kwargs)
 
 # Initialize global cache and pattern rules for session (reused across all calls)
-ai_cache = AICache()
 pattern_rules = PatternRules()
 
+@functools.lru_cache(maxsize=1)
+def _get_ai_cache():
+    """Shared AI cache, opened the first time it's needed (so --help, --undo etc. never touch ai_cache.db)."""
+    return AICache()
+
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    """Shared Groq client so every batch reuses the same open connections."""
+    http_client = httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,  # many requests can share one connection at the same time (needs the h2 package)
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),  # keep connections open between batches
+    )
+    # The SDK retries 429s, 5xx and dropped connections itself, waiting as long as Retry-After says (or backing off with jitter)
+    return Groq(api_key=GROQ_KEY, http_client=http_client, max_retries=API_MAX_RETRIES)
+
 def analyze_image_with_vision(meta, client):
     """Uses Groq vision model to describe image content for better naming."""
     if not meta.get("image_base64"):
@@ -38,7 +93,7 @@ Keep response under 100 words. Be specific and factual."""
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{meta['image_base64']}"
+                            "url": (b"data:image/jpeg;base64," + meta["image_base64"]).decode("ascii")  # glue on the header and only turn it into text at the very end
                         }
                     }
                 ]
@@ -47,70 +102,133 @@ Keep response under 100 words. Be specific and factual."""
             temperature=0.2
         )
         return response.choices[0].message.content
+    except RateLimitError:
+        _print(f"[dim]Vision API still rate limited after {API_MAX_RETRIES} retries: {meta['filename']}[/dim]")
+        return None
     except Exception as e:
-        console.print(f"[dim]Vision API unavailable: {e}[/dim]")
+        _print(f"[dim]Vision API unavailable: {e}[/dim]")
         return None
 
-def try_parse_json(text):
-    """Try multiple strategies to parse potentially malformed JSON."""
+_JSON_SPECIAL_CHARS = re.compile(r'[\[\]"\'\\]')  # the only characters that matter for finding where an array starts and ends
+
+def _iter_arrays(text):
+    """Yield each top-level [...] block in text, ignoring brackets inside strings."""
+    depth = 0
+    start = None
+    quote = None  # the quote we're inside of, or None when outside a string
+    escaped_pos = -1
+    for m in _JSON_SPECIAL_CHARS.finditer(text):  # jump straight to the interesting characters in one pass
+        pos = m.start()
+        if pos == escaped_pos:
+            continue  # this character was escaped by a backslash, so it doesn't count
+        ch = text[pos]
+        if ch == "\\":
+            escaped_pos = pos + 1
+        elif quote:
+            if ch == quote:
+                quote = None  # string ended
+        elif depth == 0:
+            if ch == "[":  # quotes before the array (like "Here's the JSON") are ignored
+                start = pos
+                depth = 1
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+            if depth == 0:
+                yield text[start:pos + 1]
+
+def _apply_cached_vision(meta):
+    """Fingerprint an image and reuse its vision description if we've seen the same picture before."""
+    if meta.get("vision_description"):
+        return
+    if "image_sha256" not in meta:
+        image_b64 = meta.get("image_base64")
+        if not image_b64:
+            return
+        meta["image_sha256"] = hashlib.sha256(image_b64).hexdigest()  # same picture = same fingerprint
+    vision_desc = _get_ai_cache().get_vision(meta["image_sha256"])  # works from the fingerprint alone, so saved metadata needs no thumbnail
+    if vision_desc:
+        meta["vision_description"] = vision_desc
+        meta["content_preview"] = f"[Vision]: {vision_desc}"
+
+def drop_thumbnail(meta):
+    """Remove an image's thumbnail, keeping its fingerprint so the vision cache still recognizes it."""
+    image_b64 = meta.pop("image_base64", None)
+    if image_b64 and "image_sha256" not in meta:
+        meta["image_sha256"] = hashlib.sha256(image_b64).hexdigest()
+
+def _reload_thumbnail(meta):
+    """Make the thumbnail again from the file (it was dropped, or the metadata came from the cache). True if it worked."""
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
+        meta["image_base64"] = load_thumbnail(Path(meta["folder_path"]) / meta["filename"])
+    except Exception:
+        return False  # no thumbnail just means no vision description, same as a broken image
+    meta.setdefault("image_sha256", hashlib.sha256(meta["image_base64"]).hexdigest())  # set_vision needs it, and a thumbnail that failed before has none yet
+    return True
 
-    match = re.search(r'\[.*\]', text, re.DOTALL)
-    if match:
+def _repair_json(text):
+    """Fix the usual small AI mistakes: trailing commas and single quotes."""
+    fixed = re.sub(r',\s*([}\]])', r'\1', text)
+    return fixed.replace("'", '"')
+
+def try_parse_json(text):
+    """Parse the AI's JSON answer, pulling the array out of any extra text and repairing small mistakes."""
+    for candidate in list(_iter_arrays(text)) or [text]:
         try:
-            return json.loads(match.group())
-        except json.JSONDecodeError:
+            return jsonio.loads(candidate)  # fast path: most answers are already valid JSON
+        except ValueError:
             pass
-
-    fixed = text
-    fixed = re.sub(r',\s*}', '}', fixed)
-    fixed = re.sub(r',\s*\]', ']', fixed)
-    fixed = fixed.replace("'", '"')
-    try:
-        return json.loads(fixed)
-    except json.JSONDecodeError:
-        pass
-
-    match = re.search(r'\[.*\]', fixed, re.DOTALL)
-    if match:
         try:
-            return json.loads(match.group())
-        except json.JSONDecodeError:
+            return jsonio.loads(_repair_json(candidate))
+        except ValueError:
             pass
 
     return None
 
 def analyze_files_with_ai(files_metadata, series_tracker=None, category_tracker=None, memory_tracker=None):
-    """Sends file metadata to Groq for smart categorization with naming strategy."""
-    if not GROQ_KEY:
-        console.print("[red]Error: GROQ_API_KEY not found in .env[/red]")
-        return None
+    """Sends file metadata to Groq for smart categorization with naming strategy.
 
+    Returns one result per file; a file the AI couldn't answer for gets None (callers use their fallback for it).
+    Thumbnails ("image_base64") are removed from every meta on the way out; "image_sha256" stays.
+    """
+    try:
+        return _analyze_files(files_metadata, series_tracker, category_tracker, memory_tracker)
+    finally:
+        # The image data is only needed for the vision call - drop it however we leave (cache hits and errors too), so thumbnails don't pile up in memory
+        for meta in files_metadata:
+            drop_thumbnail(meta)
+
+def _analyze_files(files_metadata, series_tracker, category_tracker, memory_tracker):
+    """The body of analyze_files_with_ai (which cleans up the thumbnails afterwards)."""
+    ai_cache = _get_ai_cache()
     # Phase 1: Try cache and pattern rules first (fast, no API calls)
     results = []
     files_needing_ai = []  # files that need actual AI analysis
     files_needing_ai_indices = []  # track original indices
 
     for i, meta in enumerate(files_metadata):
+        # Fill in a remembered vision description first, so the cache key matches the one saved after the last vision call
+        _apply_cached_vision(meta)
+
         # Try cache first
         cached_result = ai_cache.get(meta)
         if cached_result:
             results.append(cached_result)
             continue  # skip AI call, use cached result
 
-        # Try pattern matching second
+        # Try pattern matching second (only trust it on its own when it's as sure as an auto-accept)
         pattern_match = pattern_rules.match_pattern(meta)
-        if pattern_match:
-            # Pattern match found - use it and cache it
+        if pattern_match and pattern_match["confidence"] >= HIGH_CONFIDENCE_THRESHOLD:
+            # Strong pattern match found - use it and cache it
             ai_cache.set(meta, pattern_match)
             results.append(pattern_match)
-            console.print(f"[dim]📋 Pattern matched: {meta['filename']} → {pattern_match['context']}[/dim]")
+            _print(f"[dim]📋 Pattern matched: {meta['filename']} → {pattern_match['context']}[/dim]")
             continue  # skip AI call
 
-        # No cache or pattern match - need AI analysis
+        # No cache or strong pattern match - need AI analysis
         results.append(None)  # placeholder
         files_needing_ai.append(meta)
         files_needing_ai_indices.append(i)
@@ -119,49 +237,60 @@ def analyze_files_with_ai(files_metadata, series_tracker=None, category_tracker=
     if not files_needing_ai:
         # All files were cached or pattern-matched!
         stats = ai_cache.get_stats()
-        console.print(f"[dim]💨 All files processed from cache/patterns (hit rate: {stats['hit_rate']:.1f}%)[/dim]")
+        _print(f"[dim]💨 All files processed from cache/patterns (hit rate: {stats['hit_rate']:.1f}%)[/dim]")
         return results
 
-    console.print(f"[dim]Analyzing {len(files_needing_ai)}/{len(files_metadata)} files with AI (others cached/matched)[/dim]")
+    if not GROQ_KEY:  # only needed once we actually have to call the AI
+        _print("[red]Error: GROQ_API_KEY not found in .env[/red]")
+        return results  # cached and pattern-matched files keep their answers; the rest stay None
+
+    # Files that look exactly alike to the cache (same name, size, folder, preview) get the same answer, so only ask once per group
+    duplicate_groups = defaultdict(list)  # cache key -> positions in files_needing_ai
+    for j, meta in enumerate(files_needing_ai):
+        duplicate_groups[ai_cache.generate_cache_key(meta)].append(j)
+    duplicate_groups = list(duplicate_groups.values())
+    representatives = [files_needing_ai[group[0]] for group in duplicate_groups]  # first file of each group speaks for the rest
+
+    _print(f"[dim]Analyzing {len(files_needing_ai)}/{len(files_metadata)} files with AI (others cached/matched)[/dim]")
+    if len(representatives) < len(files_needing_ai):
+        _print(f"[dim]{len(files_needing_ai) - len(representatives)} duplicate files will reuse another file's answer[/dim]")
 
-    client = Groq(api_key=GROQ_KEY)
+    client = _get_client()  # reuse the same client instead of making a new one (and a new connection) every batch
 
     # Step 1: For images (that need AI), get vision descriptions first (but skip simple screenshots to save time/money)
-    for meta in files_needing_ai:
-        if meta["extension"] in IMAGE_EXTENSIONS and meta.get("image_base64"):
+    vision_metas = []  # images we actually want the vision model to look at
+    for meta in representatives:  # duplicates share their group's description, so don't look at them twice
+        if meta["extension"] in IMAGE_EXTENSIONS and not meta.get("vision_description"):
             # Skip vision for obvious screenshots (filename pattern)
-            filename_lower = meta.get("original_stem", "").lower()
-            if "screenshot" in filename_lower or "screen shot" in filename_lower:
-                console.print(f"[dim]Skipping vision for screenshot: {meta['filename']}[/dim]")
+            if is_screenshot(meta.get("original_stem", "")):
+                _print(f"[dim]Skipping vision for screenshot: {meta['filename']}[/dim]")
                 continue  # skip vision API for screenshots (save $ and time)
-
-            with console.status(f"[bold green]Analyzing image: {meta['filename']}...[/bold green]"):
-                vision_desc = analyze_image_with_vision(meta, client)
+            if meta.get("image_base64") or _reload_thumbnail(meta):  # checked after the screenshot test, since screenshots don't get a thumbnail
+                vision_metas.append(meta)
+
+    if vision_metas:
+        _print(f"[dim]Analyzing {len(vision_metas)} images with vision...[/dim]")
+        # Send the image requests side by side instead of waiting for each one to finish before starting the next
+        with ThreadPoolExecutor(max_workers=VISION_CONCURRENCY) as executor:  # at most VISION_CONCURRENCY requests in flight
+            futures = {executor.submit(_keep_log(analyze_image_with_vision), meta, client): meta for meta in vision_metas}  # workers log like we do
+            # Handle each answer as soon as it arrives (on this thread, so only one thread ever prints or touches the cache)
+            for done, future in enumerate(as_completed(futures), 1):
+                meta = futures[future]
+                vision_desc = future.result()
                 if vision_desc:
                     meta["vision_description"] = vision_desc
                     meta["content_preview"] = f"[Vision]: {vision_desc}"
+                    ai_cache.set_vision(meta["image_sha256"], vision_desc)  # remember it so the same picture is never described twice
+                _print(f"[dim]  Vision {done}/{len(vision_metas)}: {meta['filename']}[/dim]")  # little progress counter
 
-    # Step 2: Build detailed info string (only for files needing AI)
-    items_str = ""
-    for i, meta in enumerate(files_needing_ai):
-        preview = meta.get("content_preview", "")[:500]
-        exif_str = ", ".join(f"{k}: {v}" for k, v in meta.get("exif", {}).items()) or "none"
-        neighbors = ", ".join(meta.get("neighboring_files", [])[:5]) or "none"
-
-        items_str += (
-            f"File {i+1}:\n"
-            f"  Original Filename: {meta['filename']}\n"
-            f"  Original Stem: {meta.get('original_stem', meta['filename'].rsplit('.', 1)[0])}\n"
-            f"  Type: {meta['extension']}\n"
-            f"  Size: {meta['size']/1024:.0f}KB\n"
-            f"  Folder: {meta.get('folder_name', 'unknown')}\n"
-            f"  Folder Path: {meta.get('folder_path', 'unknown')}\n"
-            f"  Date: {meta.get('created_date', 'unknown')}\n"
-            f"  EXIF: {exif_str}\n"
-            f"  Neighboring Files: {neighbors}\n"
-            f"  Content Preview: {preview}\n\n"
-        )
+    # Give duplicates the same description their representative got, so their cache keys match next run too
+    for rep, group in zip(representatives, duplicate_groups):
+        for j in group[1:]:
+            if rep.get("vision_description"):
+                files_needing_ai[j]["vision_description"] = rep["vision_description"]
+                files_needing_ai[j]["content_preview"] = rep["content_preview"]
 
+    # Step 2: Build the shared prompt context (same for every chunk)
     series_context = ""
     if series_tracker and series_tracker.get_series_info():
         series_context = f"\nCURRENT SERIES IN SESSION:\n{json.dumps(series_tracker.get_series_info(), indent=2)}\n"
@@ -175,7 +304,57 @@ def analyze_files_with_ai(files_metadata, series_tracker=None, category_tracker=
     else:
         categories_str = "General: Misc (Fallback)" # Should not happen if tracker initialized
 
-    prompt = f"""You are a file naming assistant for a college student. Analyze these files and decide the BEST naming strategy.
+    # Step 3: Split files into chunks small enough that the AI's answer fits in max_tokens, then ask about all chunks at once
+    chunks = _chunk_by_output_tokens(representatives)  # lists of positions in representatives
+    prompts = [
+        _build_prompt([representatives[r] for r in chunk], memory_context, categories_str, series_context)
+        for chunk in chunks
+    ]
+    with ThreadPoolExecutor(max_workers=min(len(prompts), TEXT_CONCURRENCY)) as executor:  # one request per chunk, sent together but capped so a huge batch can't trip the rate limit
+        chunk_results = list(executor.map(_keep_log(lambda p: _call_text(client, p)), prompts))  # workers log like we do
+
+    for chunk, ai_results in zip(chunks, chunk_results):
+        if not ai_results:
+            continue  # this chunk failed - only its files stay None, the other chunks' answers are kept
+
+        # Merge AI results back into the full results array at correct positions
+        for r, ai_result in zip(chunk, ai_results):
+            for j in duplicate_groups[r]:  # hand the one answer to every file in the group
+                results[files_needing_ai_indices[j]] = ai_result
+
+                # Cache the AI result for future use
+                ai_cache.set(files_needing_ai[j], ai_result)
+
+    missing = results.count(None)
+    if missing:
+        _print(f"[red]AI returned no answer for {missing} of {len(results)} files[/red]")  # those files use the fallback
+
+    # Show cache stats
+    stats = ai_cache.get_stats()
+    _print(f"[dim]Cache stats: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1f}% hit rate)[/dim]")
+
+    return results
+
+def _chunk_by_output_tokens(files_metadata, per_file_tokens=80, budget=900):
+    """Greedily pack file indices into chunks whose estimated JSON answer fits in the token budget."""
+    chunks = []
+    current = []
+    used = 0
+    for i, meta in enumerate(files_metadata):
+        # Each answer is ~per_file_tokens of JSON plus the description, which grows with the filename (~4 chars per token)
+        estimate = per_file_tokens + len(meta.get("original_stem", "")) // 4
+        if current and used + estimate > budget:  # this file would overflow the answer, so start a new chunk
+            chunks.append(current)
+            current = []
+            used = 0
+        current.append(i)
+        used += estimate
+    if current:
+        chunks.append(current)
+    return chunks
+
+# The parts of the prompt that never change are built once when the module loads; only the {placeholders} get filled per batch
+_PROMPT_HEADER = """You are a file naming assistant for a college student. Analyze these files and decide the BEST naming strategy.
 
 ⚠️ CRITICAL: LEARN FROM USER CORRECTIONS BELOW - The user has manually corrected your mistakes before. Pay STRONG attention to these patterns!
 {memory_context}
@@ -204,14 +383,56 @@ SERIES DETECTION:
 {series_context}
 
 FILES TO ANALYZE:
-{items_str}
+"""
+
+_PROMPT_FILE = (
+    "File {number}:\n"
+    "  Original Filename: {filename}\n"
+    "  Original Stem: {stem}\n"
+    "  Type: {extension}\n"
+    "  Size: {size_kb:.0f}KB\n"
+    "  Folder: {folder}\n"
+    "  Folder Path: {folder_path}\n"
+    "  Date: {date}\n"
+    "  EXIF: {exif}\n"
+    "  Neighboring Files: {neighbors}\n"
+    "  Content Preview: {preview}\n\n"
+)
+
+_PROMPT_FOOTER = """
 
 Return ONLY valid JSON.
 [
-  {{"naming_strategy": "use-original", "original_filename_quality": "high", "context": "CS230P", "description": "binary-tree-hw", "refined_from_original": null, "confidence": 0.9, "confidence_reasons": ["descriptive"], "is_series": false, "series_name": null, "series_number": null}}
+  {"naming_strategy": "use-original", "original_filename_quality": "high", "context": "CS230P", "description": "binary-tree-hw", "refined_from_original": null, "confidence": 0.9, "confidence_reasons": ["descriptive"], "is_series": false, "series_name": null, "series_number": null}
 ]
-"""
-
+"""  # not a template: the JSON example's braces are meant literally
+
+def _build_prompt(chunk, memory_context, categories_str, series_context):
+    """Build the text prompt for one chunk of file metadata."""
+    buf = io.StringIO()  # write the whole prompt into one buffer so it's only turned into a string once
+    buf.write(_PROMPT_HEADER.format(memory_context=memory_context, categories_str=categories_str, series_context=series_context))  # fill in the blanks of the pre-made header
+
+    for i, meta in enumerate(chunk):
+        filename = meta["filename"]
+        buf.write(_PROMPT_FILE.format(  # same fill-in-the-blanks trick for each file
+            number=i + 1,
+            filename=filename,
+            stem=meta.get("original_stem") or filename.rsplit(".", 1)[0],
+            extension=meta["extension"],
+            size_kb=meta["size"] / 1024,
+            folder=meta.get("folder_name", "unknown"),
+            folder_path=meta.get("folder_path", "unknown"),
+            date=meta.get("created_date", "unknown"),
+            exif=", ".join(f"{k}: {v}" for k, v in meta.get("exif", {}).items()) or "none",
+            neighbors=", ".join(meta.get("neighboring_files", [])[:5]) or "none",
+            preview=meta.get("content_preview", "")[:500],
+        ))
+
+    buf.write(_PROMPT_FOOTER)
+    return buf.getvalue()
+
+def _call_text(client, prompt):
+    """Send one prompt to the text model and parse the JSON array it returns."""
     try:
         response = client.chat.completions.create(
             model=TEXT_MODEL,
@@ -221,44 +442,41 @@ Return ONLY valid JSON.
         )
         content = response.choices[0].message.content
         if not content:
-            console.print("[red]Error: AI returned empty response[/red]")
+            _print("[red]Error: AI returned empty response[/red]")
             return None
 
-        console.print(f"[dim]AI raw response: {content[:300]}...[/dim]")
+        _print(f"[dim]AI raw response: {content[:300]}...[/dim]")
 
         content = content.replace("```json", "").replace("```", "").strip()
         ai_results = try_parse_json(content)
 
         if ai_results:
-            # Merge AI results back into the full results array at correct positions
-            for i, ai_result in enumerate(ai_results):
-                original_index = files_needing_ai_indices[i]
-                results[original_index] = ai_result
-
-                # Cache the AI result for future use
-                ai_cache.set(files_needing_ai[i], ai_result)
+            return ai_results
 
-            # Show cache stats
-            stats = ai_cache.get_stats()
-            console.print(f"[dim]Cache stats: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1f}% hit rate)[/dim]")
-
-            return results
-
-        console.print(f"[red]Could not parse AI response as JSON[/red]")
+        _print(f"[red]Could not parse AI response as JSON[/red]")
         return None
 
+    except RateLimitError:
+        _print(f"[red]Groq rate limit:[/red] still limited after {API_MAX_RETRIES} retries, try again in a minute")
+        return None
     except Exception as e:
-        console.print(f"[red]Groq Error:[/red] {e}")
+        _print(f"[red]Groq Error:[/red] {e}")
         return None
 
-def generate_new_name(meta, ai_result, series_tracker=None):
-    """Creates filename based on AI-determined naming strategy."""
+# One lookup table that turns spaces/underscores into dashes and A-Z into a-z in a single pass
+_FNAME_TRANS = str.maketrans({" ": "-", "_": "-", **{chr(c): chr(c + 32) for c in range(ord("A"), ord("Z") + 1)}})
+
+def _clean_name_part(text):
+    """Dash-separate and lowercase a piece of a filename."""
+    cleaned = text.translate(_FNAME_TRANS)
+    return cleaned if cleaned.isascii() else cleaned.lower()  # the table only knows A-Z, so accents etc. still need lower()
+
+def generate_new_name(meta, ai_result, series_tracker=None, context_override=None, desc_override=None):
+    """Creates filename based on AI-determined naming strategy (overrides replace the AI's context/description)."""
     strategy = ai_result.get("naming_strategy", "use-new-description")
-    context = ai_result.get("context", "Misc")
-    description = ai_result.get("description", "file")
-    created_dt = datetime.datetime.fromtimestamp(meta["created"])
-    year = created_dt.year
-    season = get_season(created_dt)
+    context = context_override if context_override is not None else ai_result.get("context", "Misc")  # user's choice wins, no dict copy needed
+    description = desc_override if desc_override is not None else ai_result.get("description", "file")
+    year, season = get_year_season(meta["created"])  # one cached lookup instead of building a datetime for every file
     ext = meta["extension"]
 
     is_series = ai_result.get("is_series") or ai_result.get("series_detection", {}).get("is_series", False)
@@ -275,14 +493,14 @@ def generate_new_name(meta, ai_result, series_tracker=None):
 
     if strategy == "use-original":
         original_stem = meta.get("original_stem", Path(meta["filename"]).stem)
-        clean_stem = original_stem.replace(" ", "-").replace("_", "-").lower()
+        clean_stem = _clean_name_part(original_stem)
         return f"{year}-{season}__{context}__{clean_stem}{series_suffix}{ext}"
 
     elif strategy == "refine-original":
         refined = ai_result.get("refined_from_original") or description
-        clean_desc = refined.replace(" ", "-").replace("_", "-").lower()
+        clean_desc = _clean_name_part(refined)
         return f"{year}-{season}__{context}__{clean_desc}{series_suffix}{ext}"
 
     else:
-        clean_desc = description.replace(" ", "-").replace("_", "-").lower()
+        clean_desc = _clean_name_part(description)
         return f"{year}-{season}__{context}__{clean_desc}{series_suffix}{ext}"
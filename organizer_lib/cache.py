@@ -1,42 +1,75 @@
-import json
+import os
+import re
+import time
+import atexit
+import threading
+import sqlite3
 import hashlib
-import datetime
+import functools
 from pathlib import Path
+from collections import OrderedDict
 from rich.console import Console
 
+try:
+    import xxhash  # much faster hash for cache keys (optional)
+except ImportError:
+    xxhash = None  # fall back to hashlib if it isn't installed
+
+try:
+    import hyperscan  # optional: checks all filename patterns at once in fast compiled code
+except ImportError:
+    hyperscan = None  # fall back to the precompiled Python regex
+
 from .config import PROJECT_ROOT
+from . import jsonio  # orjson when available, json otherwise
 
 console = Console()
 
+def _locked(method):
+    """Run the method while holding the cache's lock (the cache is shared with the background prefetch thread)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class AICache:
     """Cache AI results for similar files to improve performance and reduce API calls"""
 
-    def __init__(self, cache_ttl_hours=24):  # cache valid for 24 hours by default
-        self.cache_file = PROJECT_ROOT / "ai_cache.json"
+    def __init__(self, cache_ttl_hours=24, vision_max_age_days=30):  # cache valid for 24 hours by default; vision rows until unused for 30 days
+        self.cache_file = PROJECT_ROOT / "ai_cache.db"  # SQLite file so each insert only writes one row
         self.cache_ttl_hours = cache_ttl_hours
-        self.cache = self._load_cache()
+        self.vision_max_age_days = vision_max_age_days
+        self._lock = threading.RLock()  # one thread at a time; RLock because set() may call flush() while holding it
+        self.db = self._open_db()
+        self._mem = OrderedDict()  # small in-memory copy of recent entries so repeat lookups skip the database
+        self.mem_max_entries = 2048
         self.hits = 0  # track cache performance
+        self.hits_mem = 0  # hits answered from memory without touching the database
         self.misses = 0
-
-    def _load_cache(self):
-        """Load cache from disk"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-        return {}
-
-    def _save_cache(self):
-        """Save cache to disk"""
+        self.flush_every = 50  # save to disk after this many writes...
+        self.flush_interval = 30  # ...or after this many seconds, whichever comes first
+        self._pending_entries = {}  # cache key -> row waiting to be saved
+        self._pending_vision = {}  # image fingerprint -> row waiting to be saved
+        self._seen_vision = set()  # saved fingerprints looked up this run (flush moves their ts up, so they don't age out)
+        self._last_flush = time.time()
+        self._clean_old_entries()  # drop expired rows once at startup
+        atexit.register(self.flush)  # save whatever is left when the program exits (also after Ctrl-C)
+
+    def _open_db(self):
+        """Open (or create) the cache database"""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-        except IOError as e:
-            console.print(f"[dim]Warning: Could not save cache: {e}[/dim]")
-
-    def _generate_cache_key(self, file_meta):
+            db = sqlite3.connect(self.cache_file, isolation_level=None, check_same_thread=False)  # usable from the prefetch thread too (guarded by _lock); autocommit: every statement saves right away (set() batches its own writes, see flush)
+        except sqlite3.Error as e:
+            console.print(f"[dim]Warning: Could not open cache, using memory only: {e}[/dim]")
+            db = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")  # append changes to a log instead of rewriting the file
+        db.execute("PRAGMA synchronous=NORMAL")  # don't wait for the disk on every single write
+        db.execute("CREATE TABLE IF NOT EXISTS entries(key TEXT PRIMARY KEY, result TEXT, ts REAL, filename TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS vision(sha TEXT PRIMARY KEY, description TEXT, ts REAL)")  # image fingerprint -> description
+        return db
+
+    def generate_cache_key(self, file_meta):
         """Generate a cache key based on file characteristics that affect AI analysis"""
         # Key factors: filename, extension, size, folder, content preview snippet
         key_parts = [
@@ -47,62 +80,112 @@ class AICache:
             file_meta.get("content_preview", "")[:100],  # first 100 chars only
         ]
 
-        key_string = "|".join(key_parts)
-        return hashlib.md5(key_string.encode()).hexdigest()  # hash for compact storage
-
-    def _is_cache_valid(self, cache_entry):
-        """Check if cache entry is still valid (not expired)"""
-        if "timestamp" not in cache_entry:
-            return False
-
-        cached_time = datetime.datetime.fromisoformat(cache_entry["timestamp"])
-        now = datetime.datetime.now()
-        age_hours = (now - cached_time).total_seconds() / 3600
+        key_bytes = "|".join(key_parts).encode()  # both hashes want bytes (newer xxhash refuses str)
+        if xxhash:
+            return xxhash.xxh3_64_hexdigest(key_bytes)  # fast non-crypto hash (this key isn't a secret, it just needs to be short)
+        return hashlib.md5(key_bytes).hexdigest()  # hash for compact storage
 
+    def _is_fresh(self, ts):
+        """Check if a cache entry written at ts is still valid (not expired)"""
+        age_hours = (time.time() - ts) / 3600
         return age_hours < self.cache_ttl_hours  # cache is valid if younger than TTL
 
+    @_locked
     def get(self, file_meta):
         """Try to get cached AI result for this file"""
-        cache_key = self._generate_cache_key(file_meta)
-
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if self._is_cache_valid(cache_entry):
-                self.hits += 1
-                return cache_entry.get("result")
+        cache_key = self.generate_cache_key(file_meta)
+
+        mem_entry = self._mem.get(cache_key)  # check memory first (just a dict lookup)
+        if mem_entry and self._is_fresh(mem_entry[1]):
+            self._mem.move_to_end(cache_key)  # mark as recently used
+            self.hits += 1
+            self.hits_mem += 1
+            return mem_entry[0]
+
+        row = self.db.execute("SELECT result, ts FROM entries WHERE key=?", (cache_key,)).fetchone()  # look up just this one row
+        if row and self._is_fresh(row[1]):
+            self.hits += 1
+            result = jsonio.loads(row[0])
+            self._remember(cache_key, result, row[1])  # keep it in memory for next time
+            return result
 
         self.misses += 1
         return None  # cache miss
 
+    @_locked
     def set(self, file_meta, ai_result):
         """Store AI result in cache"""
-        cache_key = self._generate_cache_key(file_meta)
-
-        self.cache[cache_key] = {
-            "result": ai_result,
-            "timestamp": datetime.datetime.now().isoformat(),
-            "filename": file_meta.get("filename", "unknown")  # for debugging
-        }
-
-        # Periodically clean old entries to keep cache small
-        if len(self.cache) > 1000:  # max 1000 entries
-            self._clean_old_entries()
-
-        self._save_cache()
+        cache_key = self.generate_cache_key(file_meta)
+        now = time.time()
+
+        # Queue the row instead of writing it now; get() still finds it because it's in memory too
+        self._pending_entries[cache_key] = (cache_key, jsonio.dumps(ai_result), now, file_meta.get("filename", "unknown"))  # filename kept for debugging
+        self._remember(cache_key, ai_result, now)  # write to memory too
+        self._maybe_flush()
+
+    def _remember(self, cache_key, ai_result, ts):
+        """Keep an entry in the in-memory LRU, evicting the oldest when full"""
+        self._mem[cache_key] = (ai_result, ts)
+        self._mem.move_to_end(cache_key)
+        if len(self._mem) > self.mem_max_entries:
+            self._mem.popitem(last=False)  # forget the least recently used entry
+
+    @_locked
+    def get_vision(self, image_sha):
+        """Get a saved vision description for an image fingerprint (the same pixels always look the same, so it only ages out once unused)"""
+        pending = self._pending_vision.get(image_sha)
+        if pending:
+            return pending[1]  # saved this run but not written to disk yet
+        row = self.db.execute("SELECT description FROM vision WHERE sha=?", (image_sha,)).fetchone()
+        if row is None:
+            return None
+        self._seen_vision.add(image_sha)  # still in use
+        return row[0]
+
+    @_locked
+    def set_vision(self, image_sha, description):
+        """Save the vision description for an image fingerprint"""
+        self._pending_vision[image_sha] = (image_sha, description, time.time())
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Save queued rows once there are enough of them or they've waited long enough"""
+        pending = len(self._pending_entries) + len(self._pending_vision)
+        if pending >= self.flush_every or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    @_locked
+    def flush(self):
+        """Write all queued rows in one transaction (one disk sync instead of one per row)"""
+        self._last_flush = time.time()
+        if not self._pending_entries and not self._pending_vision and not self._seen_vision:
+            return
+        try:
+            with self.db:  # commits at the end, or undoes everything if something fails
+                self.db.execute("BEGIN")  # one transaction: all rows land together or not at all
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO entries(key, result, ts, filename) VALUES (?, ?, ?, ?)",  # one row per file, not the whole cache
+                    self._pending_entries.values()
+                )
+                self.db.executemany("INSERT OR REPLACE INTO vision(sha, description, ts) VALUES (?, ?, ?)", self._pending_vision.values())
+                self.db.executemany("UPDATE vision SET ts=? WHERE sha=?", ((self._last_flush, sha) for sha in self._seen_vision))
+        except sqlite3.Error as e:
+            console.print(f"[dim]Warning: Could not save cache: {e}[/dim]")
+            return  # keep the rows queued and try again next time
+        self._pending_entries.clear()
+        self._pending_vision.clear()
+        self._seen_vision.clear()
 
     def _clean_old_entries(self):
-        """Remove expired cache entries"""
-        keys_to_remove = []
+        """Remove expired cache entries, and vision descriptions no run has used in vision_max_age_days"""
+        now = time.time()
+        removed = self.db.execute("DELETE FROM entries WHERE ts < ?", (now - self.cache_ttl_hours * 3600,)).rowcount
+        removed += self.db.execute("DELETE FROM vision WHERE ts < ?", (now - self.vision_max_age_days * 86400,)).rowcount
 
-        for key, entry in self.cache.items():
-            if not self._is_cache_valid(entry):
-                keys_to_remove.append(key)
-
-        for key in keys_to_remove:
-            del self.cache[key]
-
-        console.print(f"[dim]Cache cleanup: removed {len(keys_to_remove)} expired entries[/dim]")
+        if removed:
+            console.print(f"[dim]Cache cleanup: removed {removed} expired entries[/dim]")
 
+    @_locked
     def get_stats(self):
         """Get cache performance statistics"""
         total_requests = self.hits + self.misses
@@ -110,18 +193,111 @@ class AICache:
 
         return {
             "hits": self.hits,
+            "hits_mem": self.hits_mem,  # how many of the hits never touched the database
             "misses": self.misses,
             "hit_rate": hit_rate,
-            "cache_size": len(self.cache)
+            "cache_size": self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] + len(self._pending_entries)  # close enough: a queued row may replace a saved one
         }
 
+    @_locked
     def clear(self):
         """Clear entire cache"""
-        self.cache = {}
-        self._save_cache()
+        self.db.execute("DELETE FROM entries")
+        self._pending_entries.clear()
+        self._mem.clear()
         console.print("[dim]Cache cleared[/dim]")
 
 
+class MetadataCache:
+    """Remember the slow part of get_file_metadata (previews, EXIF) between runs.
+
+    Thumbnails aren't saved - only their fingerprint ("image_sha256"), which is all the vision cache needs.
+    """
+
+    CONTENT_FIELDS = ("content_preview", "exif")  # saved as JSON, along with the image fingerprint
+
+    def __init__(self, max_age_days=30):  # rows for files we haven't seen in this long are dropped
+        self.cache_file = PROJECT_ROOT / "meta_cache.db"
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()  # metadata is extracted on worker threads, so only one may use the database at a time
+        self._pending = {}  # path -> row waiting to be saved
+        self._seen = set()  # saved paths that were looked up this run (their "seen" time is updated by flush)
+        self._renames = []  # (new path, old path) for saved rows whose file was moved
+        self.db = self._open_db()
+        self._clean_old_entries()  # drop rows for files that are long gone, once at startup
+        atexit.register(self.flush)  # save whatever is left when the program exits
+
+    def _open_db(self):
+        """Open (or create) the metadata database"""
+        try:
+            db = sqlite3.connect(self.cache_file, isolation_level=None, check_same_thread=False)  # shared by the worker threads (guarded by _lock)
+        except sqlite3.Error as e:
+            console.print(f"[dim]Warning: Could not open metadata cache, using memory only: {e}[/dim]")
+            db = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS content(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, fields TEXT, seen REAL)")
+        return db
+
+    def _clean_old_entries(self):
+        """Remove rows for files no run has looked at in max_age_days"""
+        cutoff = time.time() - self.max_age_days * 86400
+        try:
+            self.db.execute("DELETE FROM content WHERE seen < ?", (cutoff,))
+        except sqlite3.Error:
+            pass  # a locked database just means we clean up next time
+
+    def get(self, file_path, stats):
+        """Return the saved content fields for this file, or None if it's new or has changed since"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            row = self._pending.get(path)
+            if row is None:
+                row = self.db.execute("SELECT path, size, mtime_ns, fields FROM content WHERE path=?", (path,)).fetchone()
+                if row is not None:
+                    self._seen.add(path)  # still around, so don't let it age out
+        if row is None or row[1] != stats.st_size or row[2] != stats.st_mtime_ns:
+            return None  # never seen, or the file was edited - read it again
+        return jsonio.loads(row[3])
+
+    def put(self, file_path, stats, meta):
+        """Queue this file's content fields to be saved (written in one go by flush)"""
+        path = os.path.abspath(file_path)
+        fields = {name: meta[name] for name in self.CONTENT_FIELDS}
+        if meta.get("image_base64"):
+            fields["image_sha256"] = hashlib.sha256(meta["image_base64"]).hexdigest()  # the same fingerprint ai_handler makes
+        with self._lock:
+            self._pending[path] = (path, stats.st_size, stats.st_mtime_ns, jsonio.dumps(fields), time.time())
+
+    def moved(self, source, destination):
+        """Follow a file that was moved, so its row isn't left behind under a path that no longer exists"""
+        old, new = os.path.abspath(source), os.path.abspath(destination)
+        with self._lock:
+            row = self._pending.pop(old, None)
+            if row is not None:
+                self._pending[new] = (new,) + row[1:]
+            self._seen.discard(old)
+            self._renames.append((new, old))  # a moved file keeps its size and mtime, so the row still matches it
+
+    def flush(self):
+        """Write all queued rows in one transaction"""
+        with self._lock:
+            if not (self._pending or self._seen or self._renames):
+                return
+            now = time.time()
+            try:
+                with self.db:
+                    self.db.execute("BEGIN")
+                    self.db.executemany("UPDATE OR REPLACE content SET path=?, seen=? WHERE path=?", ((new, now, old) for new, old in self._renames))  # before the inserts, so an old row can't overwrite a new one
+                    self.db.executemany("INSERT OR REPLACE INTO content(path, size, mtime_ns, fields, seen) VALUES (?, ?, ?, ?, ?)", self._pending.values())
+                    self.db.executemany("UPDATE content SET seen=? WHERE path=?", ((now, path) for path in self._seen))
+            except sqlite3.Error as e:
+                console.print(f"[dim]Warning: Could not save metadata cache: {e}[/dim]")
+                return
+            self._pending.clear()
+            self._seen.clear()
+            self._renames.clear()
+
 class PatternRules:
     """Extension and filename pattern rules for quick categorization without AI"""
 
@@ -147,22 +323,54 @@ class PatternRules:
             ".docx": [("Academic", 0.3), ("Work", 0.3), ("Personal", 0.2)],
         }
 
+        # Compile every pattern once into a single regex (instead of re-checking 7 patterns per file)
+        self._rules = [(pattern, category, confidence) for pattern, (category, confidence) in self.filename_patterns.items()]
+        # Each branch looks ahead from the start, so the FIRST pattern in the list still wins (same order as before)
+        self._union = re.compile(
+            "^(?:" + "|".join(f"(?=.*?(?P<g{i}>{pattern}))" for i, (pattern, _, _) in enumerate(self._rules)) + ")",
+            re.IGNORECASE | re.DOTALL
+        )
+        self._hs_db = self._build_hyperscan_db() if hyperscan else None  # only used when hyperscan is installed
+
+    def _build_hyperscan_db(self):
+        """Compile all filename patterns into one Hyperscan database (None if it can't be built)"""
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[pattern.encode() for pattern, _, _ in self._rules],
+                ids=list(range(len(self._rules))),  # id = position in the rule list
+                elements=len(self._rules),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(self._rules)  # report each rule once
+            )
+            return db
+        except Exception:
+            return None  # pattern not supported by hyperscan - use the regex instead
+
+    def _find_rule_index(self, filename):
+        """Return the position of the first rule that matches filename, or None"""
+        if self._hs_db:
+            matched = []
+            self._hs_db.scan(filename.encode(), match_event_handler=lambda rule_id, *_: matched.append(rule_id))
+            return min(matched) if matched else None  # lowest id = earliest rule, same priority as the regex path
+
+        m = self._union.match(filename)  # one match call checks all patterns
+        return int(m.lastgroup[1:]) if m else None  # "g3" -> rule number 3
+
     def match_pattern(self, file_meta):
         """Try to match filename against known patterns"""
-        import re
-
         filename = file_meta.get("original_stem", "").lower()
 
-        for pattern, (category, confidence) in self.filename_patterns.items():
-            if re.search(pattern, filename, re.IGNORECASE):
-                return {
-                    "context": category,
-                    "confidence": confidence,
-                    "naming_strategy": "refine-original",
-                    "description": filename,
-                    "source": "pattern_rule",  # indicate this came from pattern matching
-                    "pattern": pattern
-                }
+        index = self._find_rule_index(filename)
+        if index is not None:
+            pattern, category, confidence = self._rules[index]
+            return {
+                "context": category,
+                "confidence": confidence,
+                "naming_strategy": "refine-original",
+                "description": filename,
+                "source": "pattern_rule",  # indicate this came from pattern matching
+                "pattern": pattern
+            }
 
         return None  # no pattern match
 
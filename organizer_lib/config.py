@@ -6,11 +6,13 @@ from dotenv import load_dotenv
 PROJECT_ROOT = Path(__file__).parent.parent
 
 # Load environment
-load_dotenv(PROJECT_ROOT / ".env", override=True)
+if not os.getenv("GROQ_API_KEY"):  # only open .env when the key isn't already set in the shell
+    load_dotenv(PROJECT_ROOT / ".env", override=False)
 
 # Configuration
-DESTINATION_ROOT = Path.home() / "Documents" / "Organized"
-TRASH_DIR = Path.home() / ".Trash"
+HOME = Path.home()  # look up the home folder once and reuse it everywhere
+DESTINATION_ROOT = HOME / "Documents" / "Organized"
+TRASH_DIR = HOME / ".Trash"
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 
 # Supported file types
@@ -26,6 +28,11 @@ IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
 # AI Configuration
 VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"  # Groq Llama 4 vision model
 TEXT_MODEL = "llama-3.1-8b-instant"  # fast text model
+API_MAX_RETRIES = 5  # how many times to retry a rate-limited or failed Groq request before giving up
+VISION_CONCURRENCY = 4  # how many images we ask the vision model about at the same time (keeps us under Groq's rate limit)
+TEXT_CONCURRENCY = 8  # how many naming requests (one per chunk of files) can be in flight at once
+MAX_CONCURRENCY = 8  # how many files we read metadata from at the same time (--max-concurrency changes it)
+METADATA_READ_AHEAD = 64  # how many files past the batch being loaded get their metadata read early (each holds its thumbnail until reviewed)
 NEIGHBOR_COUNT = 7
 HIGH_CONFIDENCE_THRESHOLD = 0.85
 LOW_CONFIDENCE_THRESHOLD = 0.60
@@ -0,0 +1,50 @@
+import os
+import json
+import mmap
+
+try:
+    import orjson  # fast JSON library written in Rust (optional)
+except ImportError:
+    orjson = None  # fall back to the built-in json module
+
+
+def dumps(obj, indent=False):
+    """Encode obj as JSON bytes (uses orjson when installed)"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def loads(data):
+    """Decode JSON from bytes or str; raises ValueError on bad input"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+MMAP_MIN_BYTES = 64 * 1024  # smaller files are quicker to just read
+
+
+def load_file(path):
+    """Decode a whole JSON file; raises OSError if it can't be read and ValueError on bad JSON"""
+    with open(path, 'rb') as f:
+        if orjson and os.fstat(f.fileno()).st_size >= MMAP_MIN_BYTES:
+            # orjson parses the mapped pages directly, so a big file isn't copied into a bytes object first
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return loads(f.read())  # the built-in json can't parse a mapping without copying it anyway
+
+
+def write_file(path, obj, durable=False):
+    """Write obj as indented JSON, all at once: a crash leaves either the old file or the new one, never half of one.
+
+    durable=True also fsyncs before the swap; plain saves leave flushing to the OS.
+    """
+    path = os.fspath(path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(obj, indent=True))
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())  # make sure it's really on disk before it replaces the old file
+    os.replace(tmp_path, path)  # swap in the new file in one step
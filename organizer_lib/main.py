@@ -1,33 +1,72 @@
-import shutil
+import os
 import time
+import signal
+import threading
 import argparse
+import contextlib
 import datetime
+import functools
+import types
 from pathlib import Path
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
+from rich.text import Text
 
 from .config import (
     DESTINATION_ROOT, TRASH_DIR, HIGH_CONFIDENCE_THRESHOLD,
-    FOLDER_BATCH_MODE, LOW_CONFIDENCE_THRESHOLD, MIN_FILES_FOR_FOLDER_GROUPING  # import the new threshold config
+    FOLDER_BATCH_MODE, LOW_CONFIDENCE_THRESHOLD, MIN_FILES_FOR_FOLDER_GROUPING,  # import the new threshold config
+    MAX_CONCURRENCY, METADATA_READ_AHEAD
 )
 from .utils import (
-    get_file_metadata, get_unique_path, get_timestamp_for_season,
-    open_file_externally, get_season
+    get_file_metadata, get_timestamp_for_season, is_screenshot, sibling_listings,
+    open_file_externally, get_year_season, scan_files, StatCache
 )
 from .trackers import MemoryTracker, SeriesTracker, CategoryTracker
-from .ai_handler import analyze_files_with_ai, generate_new_name
+from .ai_handler import analyze_files_held, show_messages, generate_new_name, drop_thumbnail
 from .undo import UndoHistory  # import undo functionality
+from .cache import MetadataCache
+from .mover import MoveQueue, move_file, ensure_folder, reset_made_folders  # background file moves
 
 console = Console()
 
+# Stand-in AI answers for when the AI fails; read-only, so one copy can be shared by every file
+_FALLBACK_RESULT = types.MappingProxyType({"confidence": 0.3, "context": "Review", "description": "file"})
+_FALLBACK_FOLDER_RESULT = types.MappingProxyType({"context": "Misc", "confidence": 0.3})
+
+_REVIEW_ACTIONS = Text.from_markup(  # the action menu never changes, so it's built once
+    "\n[bold]Actions:[/bold]\n"
+    "  [green]Enter[/green]  Accept and move file\n"
+    "  [yellow]o[/yellow]      Open file (external)\n"
+    "  [yellow]c[/yellow]      Change context\n"
+    "  [yellow]d[/yellow]      Change description\n"
+    "  [yellow]t[/yellow]      Change timestamp\n"
+    "  [blue]s[/blue]      Skip this file\n"
+    "  [red]x[/red]      Move to Trash\n"
+    "  [red]q[/red]      Quit\n"
+)
+
 def format_confidence_display(ai_result):
     """Format confidence score with color coding and reasons."""
     confidence = ai_result.get("confidence", 0.5)
-    reasons = ai_result.get("confidence_reasons", [])
-    strategy = ai_result.get("naming_strategy", "unknown")
-    original_quality = ai_result.get("original_filename_quality", "unknown")
+    strategy = str(ai_result.get("naming_strategy", "unknown"))  # str() so the cache below can always use it as a key
+    refined = str(ai_result.get("refined_from_original", "?")) if strategy == "refine-original" else None
+    confidence_str, strategy_display, quality_display = _format_confidence(
+        confidence, strategy, str(ai_result.get("original_filename_quality", "unknown")), refined
+    )  # same inputs give the same strings, so they're built once
+
+    return {
+        "confidence_str": confidence_str,
+        "strategy_display": strategy_display,
+        "original_quality": quality_display,
+        "reasons": ai_result.get("confidence_reasons", []),
+        "confidence_value": confidence
+    }
 
+@functools.lru_cache(maxsize=1024)
+def _format_confidence(confidence, strategy, original_quality, refined):
+    """The pure string part of format_confidence_display."""
     if confidence >= HIGH_CONFIDENCE_THRESHOLD:
         color = "green"
         level = "HIGH"
@@ -44,41 +83,61 @@ def format_confidence_display(ai_result):
     if strategy == "use-original":
         strategy_display += " (keeping original name)"
     elif strategy == "refine-original":
-        refined = ai_result.get("refined_from_original", "?")
         strategy_display += f" (refined from: {refined})"
     else:
         strategy_display += " (new AI description)"
 
-    return {
-        "confidence_str": confidence_str,
-        "strategy_display": strategy_display,
-        "original_quality": f"Original name quality: {original_quality}",
-        "reasons": reasons,
-        "confidence_value": confidence
-    }
+    return confidence_str, strategy_display, f"Original name quality: {original_quality}"
 
-def infer_context_from_folder(folder_name, category_tracker):
-    """Tries to match folder name to an existing category."""
+def infer_context_from_folder(folder_name, category_tracker, name_lc=None, name_norm=None):
+    """Tries to match folder name to an existing category (name_lc/name_norm: the name already lowercased/squashed)."""
     if not category_tracker:
         return None, 0.0
 
-    folder_lower = folder_name.lower().strip()
-    all_cats = category_tracker.get_all_categories()
+    folder_lower = name_lc if name_lc is not None else folder_name.lower().strip()  # group_files_by_folder did this already
+    exact, fuzzy = category_tracker.get_normalized_index()  # category names already lowercased and squashed
 
-    for cat in all_cats:
-        if cat.lower() == folder_lower:
-            return cat, 0.95
+    cat = exact.get(folder_lower)  # one dictionary lookup instead of checking every category
+    if cat:
+        return cat, 0.95
 
-    for cat in all_cats:
-        cat_lower = cat.lower()
-        if cat_lower.replace('p', '').replace('-', '') in folder_lower.replace('-', '').replace('_', ''):
+    folder_squashed = name_norm if name_norm is not None else folder_lower.replace('-', '').replace('_', '')  # squash the folder name once, not once per category
+    for cat, cat_lower, cat_squashed in fuzzy:
+        if cat_squashed in folder_squashed:
             return cat, 0.85
         if folder_lower in cat_lower or cat_lower in folder_lower:
             return cat, 0.75
 
     return None, 0.0
 
-def review_single_file(file_path, meta, ai_result, file_index, total_files, series_tracker=None, auto_accept_high_confidence=True, category_tracker=None, memory_tracker=None, dry_run=False, undo_history=None):
+@functools.lru_cache(maxsize=4096)
+def _dest_folder(year, season, context):
+    """DESTINATION_ROOT/YYYY-Season/context, built once per combination"""
+    return DESTINATION_ROOT / f"{year}-{season}" / context
+
+def dest_folder_for(timestamp, context):
+    """Destination folder for a file created at timestamp (the season lookup is cached too)"""
+    year, season = get_year_season(timestamp)
+    return _dest_folder(year, season, context)
+
+def prefetch(items, load, executor, status):
+    """Yield load(item, stop) for each item, starting on the next item in the background as soon as one is handed out.
+
+    If the caller stops early (quit), the load waiting in the background is cancelled, or has stop set if it already started.
+    """
+    stop = threading.Event()
+    future = executor.submit(load, items[0], stop) if items else None
+    try:
+        for k in range(len(items)):
+            with console.status(status(items[k])):
+                result = future.result()  # usually ready already: it loaded while the user reviewed the previous one
+            future = executor.submit(load, items[k + 1], stop) if k + 1 < len(items) else None
+            yield result
+    finally:
+        if future is not None and not future.cancel():
+            stop.set()  # already running - it skips its AI request instead of asking about files nobody will review
+
+def review_single_file(file_path, meta, ai_result, file_index, total_files, series_tracker=None, auto_accept_high_confidence=True, category_tracker=None, memory_tracker=None, dry_run=False, undo_history=None, move_queue=None):
     """Review a single file with confidence display and auto-accept."""
     context = ai_result.get("context", "Misc")
     desc = ai_result.get("description", "File")
@@ -98,10 +157,7 @@ def review_single_file(file_path, meta, ai_result, file_index, total_files, seri
             meta["created"] = get_timestamp_for_season(year, season)
 
         new_name = generate_new_name(meta, ai_result, series_tracker)
-        created_dt = datetime.datetime.fromtimestamp(meta["created"])
-
-        season = get_season(created_dt)
-        dest_folder = DESTINATION_ROOT / f"{created_dt.year}-{season}" / context
+        dest_folder = dest_folder_for(meta["created"], context)  # same folder path is reused, not rebuilt per file
 
         if dry_run:
             # Dry run - just show what would happen
@@ -111,13 +167,10 @@ def review_single_file(file_path, meta, ai_result, file_index, total_files, seri
             console.print(f"     → [dim]would move to:[/dim] {final_path}")
         else:
             # Actually move the file
-            dest_folder.mkdir(parents=True, exist_ok=True)
-            final_path = get_unique_path(dest_folder, new_name)
-            shutil.move(str(file_path), str(final_path))
-
-            # Record move for undo
-            if undo_history:
-                undo_history.record_move(file_path, final_path, "moved")
+            ensure_folder(dest_folder)  # skips the mkdir if we already made this folder
+            # Record move for undo (once the background move has actually finished)
+            record_move = functools.partial(undo_history.record_move, dest_mtime=meta.get("modified")) if undo_history else None  # mtime we already have from the scan
+            final_path = move_file(file_path, dest_folder, new_name, move_queue, on_done=record_move)
 
             conf_display = format_confidence_display(ai_result)
             console.print(f"[green]AUTO[/green] [{file_index}/{total_files}] {conf_display['confidence_str']} {file_path.name}")
@@ -137,51 +190,37 @@ def review_single_file(file_path, meta, ai_result, file_index, total_files, seri
         year, season = timing
         meta["created"] = get_timestamp_for_season(year, season)
 
+    redraw = True  # only repaint the screen when something on it changed
     while True:
-        ai_result_copy = ai_result.copy()
-        ai_result_copy["context"] = context
-        ai_result_copy["description"] = desc
-        
-        new_name = generate_new_name(meta, ai_result_copy, series_tracker)
+        new_name = generate_new_name(meta, ai_result, series_tracker, context_override=context, desc_override=desc)  # pass the edits instead of copying the dict every loop
         date_display = datetime.datetime.fromtimestamp(meta["created"]).strftime("%Y-%m-%d")
-        created_dt = datetime.datetime.fromtimestamp(meta["created"])
-        season = get_season(created_dt)
-        dest_folder = DESTINATION_ROOT / f"{created_dt.year}-{season}" / context
+        dest_folder = dest_folder_for(meta["created"], context)
 
         conf_display = format_confidence_display(ai_result)
         neighbors = meta.get("neighboring_files", [])[:3]
 
-        console.clear()
-        console.print(Panel(
-            f"[bold cyan]File {file_index} of {total_files}[/bold cyan]\n\n"
-            f"[bold]Source:[/bold] {file_path}\n"
-            f"[bold]Destination:[/bold] [green]{dest_folder / new_name}[/green]\n\n"
-            f"[bold]Confidence:[/bold] {conf_display['confidence_str']}\n"
-            f"[dim]{conf_display['strategy_display']}[/dim]\n"
-            f"[dim]{conf_display['original_quality']}[/dim]\n"
-            f"[dim]Reasons: {', '.join(conf_display['reasons'][:2]) if conf_display['reasons'] else 'none'}[/dim]\n\n"
-            f"[dim]Size: {meta['size']/1024:.0f}KB | Context: {context} | Date: {date_display}[/dim]\n\n"
-            f"[bold]Neighboring Files:[/bold] [dim]{', '.join(neighbors) if neighbors else 'None'}[/dim]\n\n"
-            f"[bold]Content Preview:[/bold]\n[dim]{meta.get('content_preview', 'No preview')[:300]}[/dim]",
-            title="Review"
-        ))
-
-        console.print("\n[bold]Actions:[/bold]")
-        console.print("  [green]Enter[/green]  Accept and move file")
-        console.print("  [yellow]o[/yellow]      Open file (external)")
-        console.print("  [yellow]c[/yellow]      Change context")
-        console.print("  [yellow]d[/yellow]      Change description")
-        console.print("  [yellow]t[/yellow]      Change timestamp")
-        console.print("  [blue]s[/blue]      Skip this file")
-        console.print("  [red]x[/red]      Move to Trash")
-        console.print("  [red]q[/red]      Quit\n")
+        if redraw:
+            console.clear()
+            console.print(Group(Panel(
+                f"[bold cyan]File {file_index} of {total_files}[/bold cyan]\n\n"
+                f"[bold]Source:[/bold] {file_path}\n"
+                f"[bold]Destination:[/bold] [green]{dest_folder / new_name}[/green]\n\n"
+                f"[bold]Confidence:[/bold] {conf_display['confidence_str']}\n"
+                f"[dim]{conf_display['strategy_display']}[/dim]\n"
+                f"[dim]{conf_display['original_quality']}[/dim]\n"
+                f"[dim]Reasons: {', '.join(conf_display['reasons'][:2]) if conf_display['reasons'] else 'none'}[/dim]\n\n"
+                f"[dim]Size: {meta['size']/1024:.0f}KB | Context: {context} | Date: {date_display}[/dim]\n\n"
+                f"[bold]Neighboring Files:[/bold] [dim]{', '.join(neighbors) if neighbors else 'None'}[/dim]\n\n"
+                f"[bold]Content Preview:[/bold]\n[dim]{meta.get('content_preview', 'No preview')[:300]}[/dim]",
+                title="Review"
+            ), _REVIEW_ACTIONS))  # panel and menu go out in one write
 
         action = console.input("[bold yellow]> [/bold yellow]").lower().strip()
+        redraw = action in ("c", "d", "t")  # opening a file or a typo leaves the screen as it was
 
         if action == "":
-            dest_folder.mkdir(parents=True, exist_ok=True)
-            final_path = get_unique_path(dest_folder, new_name)
-            shutil.move(str(file_path), str(final_path))
+            ensure_folder(dest_folder)  # skips the mkdir if we already made this folder
+            final_path = move_file(file_path, dest_folder, new_name, move_queue)  # moves in the background so the next file shows up right away
             
             if memory_tracker:
                 if context != original_context:
@@ -263,9 +302,8 @@ def review_single_file(file_path, meta, ai_result, file_index, total_files, seri
                 time.sleep(1)
 
         elif action == "x":
-            TRASH_DIR.mkdir(exist_ok=True)
-            trash_path = get_unique_path(TRASH_DIR, file_path.name)
-            shutil.move(str(file_path), str(trash_path))
+            ensure_folder(TRASH_DIR)
+            move_file(file_path, TRASH_DIR, file_path.name, move_queue, label="trashed")  # to the trash, also in the background
             return (True, "trashed")
 
         elif action == "s":
@@ -283,17 +321,17 @@ def review_folder_batch(folder_info, all_file_metas, ai_results, series_tracker,
     # Check if memory tracker has a strong pattern for this folder (user has corrected files from this folder multiple times)
     learned_context = None
     learned_confidence = 0.0
-    if memory_tracker and folder_name in memory_tracker.memory.get("folder_patterns", {}):  # user has corrected files from this folder before
-        folder_patterns = memory_tracker.memory["folder_patterns"][folder_name]
-        if folder_patterns:  # if there are any patterns for this folder
-            # Get the most common category user chose for this folder
-            most_common_cat = max(folder_patterns.items(), key=lambda x: x[1])  # (category, count) tuple
-            correction_count = most_common_cat[1]
-            if correction_count >= 2:  # if user corrected 2+ files from this folder to same category, trust it!
-                learned_context = most_common_cat[0]
-                learned_confidence = min(0.95, 0.75 + (correction_count * 0.05))  # higher confidence with more corrections
-
-    inferred_context, infer_confidence = infer_context_from_folder(folder_name, category_tracker)
+    # Get the most common category user chose for this folder (None if they never corrected files from it)
+    most_common_cat = memory_tracker.get_best_folder_pattern(folder_name) if memory_tracker else None  # (category, count) tuple, looked up once per folder
+    if most_common_cat:
+        correction_count = most_common_cat[1]
+        if correction_count >= 2:  # if user corrected 2+ files from this folder to same category, trust it!
+            learned_context = most_common_cat[0]
+            learned_confidence = min(0.95, 0.75 + (correction_count * 0.05))  # higher confidence with more corrections
+
+    inferred_context, infer_confidence = infer_context_from_folder(
+        folder_name, category_tracker, folder_info.get("name_lc"), folder_info.get("name_norm")
+    )
 
     # Prefer learned context over inferred (user corrections > category matching)
     if learned_context and learned_confidence > infer_confidence:  # learned pattern is stronger
@@ -321,7 +359,7 @@ def review_folder_batch(folder_info, all_file_metas, ai_results, series_tracker,
     first_meta = all_file_metas[0] if all_file_metas else {}
     preview = first_meta.get("content_preview", "No preview")[:200]
 
-    console.print(Panel(
+    console.print(Group(Panel(
         f"[bold cyan]Folder {folder_index} of {total_folders}[/bold cyan]\n\n"
         f"[bold]Folder:[/bold] {folder_path}\n"
         f"[bold]Files:[/bold] {file_count} files\n\n"
@@ -331,14 +369,14 @@ def review_folder_batch(folder_info, all_file_metas, ai_results, series_tracker,
         (f" [dim](inferred from folder name)[/dim]" if infer_confidence >= 0.5 else "") +
         f"\n\n[bold]First file preview:[/bold]\n[dim]{preview}[/dim]",
         title="Folder Review"
-    ))
-
-    console.print("\n[bold]Actions:[/bold]")
-    console.print(f"  [green]Enter[/green]  Accept '{default_context}' for all")
-    console.print("  [yellow]c[/yellow]      Change context for this folder")
-    console.print("  [blue]r[/blue]      Review individually")
-    console.print("  [blue]s[/blue]      Skip folder")
-    console.print("  [red]q[/red]      Quit\n")
+    ), Text.from_markup(
+        "\n[bold]Actions:[/bold]\n"
+        f"  [green]Enter[/green]  Accept '{default_context}' for all\n"
+        "  [yellow]c[/yellow]      Change context for this folder\n"
+        "  [blue]r[/blue]      Review individually\n"
+        "  [blue]s[/blue]      Skip folder\n"
+        "  [red]q[/red]      Quit\n"
+    )))  # panel and menu in one write
 
     action = console.input("[bold yellow]> [/bold yellow]").lower().strip()
 
@@ -372,23 +410,30 @@ def review_folder_batch(folder_info, all_file_metas, ai_results, series_tracker,
         return ("quit", None, None)
     return ("batch", default_context, None)
 
-def batch_process_folder_files(files, metas, context, series_tracker, category_tracker, memory_tracker):
+def batch_process_folder_files(files, metas, context, series_tracker, category_tracker, memory_tracker, move_queue=None, print_every=50):
     stats = {"moved": 0, "errors": 0}
+    lines = []  # result lines waiting to be printed together
     timing = None
     if category_tracker:
         timing = category_tracker.get_timing_for_context(context)
     if not timing and memory_tracker:
         timing = memory_tracker.get_timing_for_context(context)
 
+    batch_created = batch_folder = None
+    if timing:
+        batch_created = get_timestamp_for_season(*timing)  # every file gets the same date...
+        batch_folder = dest_folder_for(batch_created, context)  # ...so they all go to this one folder
+        if files:
+            try:
+                ensure_folder(batch_folder)  # one mkdir for the whole batch
+            except OSError:
+                batch_folder = None  # let each file try (and report the error) on its own
+
     for file_path, meta in zip(files, metas):
         try:
             if timing:
-                year, season = timing
-                meta["created"] = get_timestamp_for_season(year, season)
+                meta["created"] = batch_created
 
-            created_dt = datetime.datetime.fromtimestamp(meta["created"])
-            season = get_season(created_dt)
-            
             ai_result = {
                 "naming_strategy": "refine-original",
                 "context": context,
@@ -398,32 +443,41 @@ def batch_process_folder_files(files, metas, context, series_tracker, category_t
             }
 
             new_name = generate_new_name(meta, ai_result, series_tracker)
-            dest_folder = DESTINATION_ROOT / f"{created_dt.year}-{season}" / context
-            dest_folder.mkdir(parents=True, exist_ok=True)
-            final_path = get_unique_path(dest_folder, new_name)
-            shutil.move(str(file_path), str(final_path))
-            console.print(f"  [green]✓[/green] {file_path.name} → {final_path.name}")
+            dest_folder = batch_folder
+            if dest_folder is None:  # no shared timing: each file's own date picks its folder
+                dest_folder = dest_folder_for(meta["created"], context)
+                ensure_folder(dest_folder)  # skips the mkdir if we already made this folder
+            final_path = move_file(file_path, dest_folder, new_name, move_queue, label="folder_batched")  # queued; a failure is reported as soon as the queue notices it
+            lines.append(f"  [green]✓[/green] {file_path.name} → {final_path.name}")  # printed in groups below, not one by one
             stats["moved"] += 1
             if memory_tracker:
                 memory_tracker.record_acceptance(meta)
         except Exception as e:
-            console.print(f"  [red]✗[/red] {file_path.name}: {e}")
+            lines.append(f"  [red]✗[/red] {file_path.name}: {e}")
             stats["errors"] += 1
+        if len(lines) >= print_every:
+            console.print("\n".join(lines))  # one print for the whole group
+            lines.clear()
+    if lines:
+        console.print("\n".join(lines))  # whatever is left over
     return stats
 
-def group_files_by_folder(files, scan_dir):  # added scan_dir parameter to detect top-level loose files
+def group_files_by_folder(entries, scan_dir_str):  # entries are (path, parent folder string) pairs from scan_files
     """Smart folder grouping that avoids treating all desktop files as one folder"""
-    folders = {}
+    folders = defaultdict(lambda: {"path": None, "files": [], "name": None})  # new folders start empty, no "is it there yet?" check
     loose_files = []  # files in the scan directory itself, not in subfolders
 
-    for f in files:
-        folder_path = str(f.parent)
-        if f.parent == scan_dir:  # file is directly in scan dir (Desktop, Downloads, etc.), not in a subfolder
+    for f, folder_path in entries:
+        if folder_path == scan_dir_str:  # file is directly in scan dir (Desktop, Downloads, etc.), not in a subfolder
             loose_files.append(f)  # treat these individually, not as one giant "Desktop" folder
         else:
-            if folder_path not in folders:
-                folders[folder_path] = {"path": f.parent, "files": [], "name": f.parent.name}
-            folders[folder_path]["files"].append(f)
+            folder_info = folders[folder_path]
+            if folder_info["path"] is None:  # first file from this folder - fill in its details once
+                folder_info["path"] = f.parent
+                folder_info["name"] = folder_info["path"].name
+                folder_info["name_lc"] = folder_info["name"].lower().strip()  # ready for category matching
+                folder_info["name_norm"] = folder_info["name_lc"].replace('-', '').replace('_', '')
+            folder_info["files"].append(f)
 
     # Filter out tiny folders (< MIN_FILES_FOR_FOLDER_GROUPING files) and add them to loose_files
     meaningful_folders = {}  # folders with enough files to warrant batch processing
@@ -439,12 +493,12 @@ def group_files_by_folder(files, scan_dir):  # added scan_dir parameter to detec
 
 def choose_directory():
     """Interactive directory chooser with file count preview"""
-    from .config import SUPPORTED_EXTENSIONS  # import here to show file counts
+    from .config import HOME
 
     common_dirs = {
-        "1": ("Downloads", Path.home() / "Downloads"),
-        "2": ("Desktop", Path.home() / "Desktop"),
-        "3": ("Documents", Path.home() / "Documents"),
+        "1": ("Downloads", HOME / "Downloads"),  # HOME is looked up once in config
+        "2": ("Desktop", HOME / "Desktop"),
+        "3": ("Documents", HOME / "Documents"),
     }
 
     console.print("\n[bold cyan]📁 Choose a directory to organize:[/bold cyan]\n")
@@ -453,7 +507,7 @@ def choose_directory():
     for key, (name, path) in common_dirs.items():
         if path.exists():
             try:
-                file_count = sum(1 for f in path.rglob('*') if f.is_file() and not f.name.startswith('.') and f.suffix.lower() in SUPPORTED_EXTENSIONS)
+                file_count = sum(1 for _ in scan_files(path, recursive=True))  # same filter as the real scan, one pass
                 console.print(f"  [yellow]{key}[/yellow]  {name:<15} [dim]({file_count} files)[/dim]")
             except:
                 console.print(f"  [yellow]{key}[/yellow]  {name:<15} [dim](unable to count)[/dim]")
@@ -527,25 +581,20 @@ def interactive_setup():
 
     return scan_dir, folder_mode, auto_accept
 
-def process_files(scan_dir, batch_size=3, recursive=False, auto_accept=True, folder_mode=None, dry_run=False):
+def process_files(scan_dir, batch_size=3, recursive=False, auto_accept=True, folder_mode=None, dry_run=False, max_concurrency=MAX_CONCURRENCY):
     """Process files with optional dry-run mode (preview without moving)"""
     series_tracker = SeriesTracker()
     category_tracker = CategoryTracker()
     memory_tracker = MemoryTracker()
     undo_history = UndoHistory() if not dry_run else None  # only track undo if actually moving files
 
+    reset_made_folders()  # a new run shouldn't trust folders remembered from an earlier one
     # Start session tracking for accuracy stats
     memory_tracker.start_session()
     
-    if recursive:
-        iterator = scan_dir.rglob('*')
-    else:
-        iterator = scan_dir.iterdir()
-    
-    from .config import SUPPORTED_EXTENSIONS
-    files = [f for f in iterator if f.is_file() and not f.name.startswith('.') and f.suffix.lower() in SUPPORTED_EXTENSIONS]
+    scanned = list(scan_files(scan_dir, recursive))  # (path, stat, folder) tuples, each file stat'ed only once
     
-    if not files:
+    if not scanned:
         console.print(f"[yellow]No supported files found in {scan_dir}[/yellow]")
         memory_tracker.end_session()  # end session even if no files
         return
@@ -553,123 +602,177 @@ def process_files(scan_dir, batch_size=3, recursive=False, auto_accept=True, fol
     if dry_run:
         console.print("[bold yellow]🔍 DRY RUN MODE - No files will be moved[/bold yellow]\n")
         
-    files.sort(key=lambda x: x.stat().st_ctime, reverse=True)
+    stat_cache = StatCache((str(f), st) for f, st, _ in scanned)  # stats from the scan, shared with metadata extraction
+    meta_cache = MetadataCache()  # previews saved from earlier runs, reused when a file hasn't changed
+    scanned.sort(key=lambda entry: entry[1].st_ctime, reverse=True)  # sort by the stat we already have
+    files = [f for f, _, _ in scanned]
+    siblings = sibling_listings(files)  # the scan already saw every folder's files, so neighbors come from here
     total = len(files)
     stats = {"moved": 0, "trashed": 0, "skipped": 0, "auto_accepted": 0, "folder_batched": 0}
     
     console.print(f"[bold green]Found {total} files to process...[/bold green]")
     use_folder_mode = folder_mode if folder_mode is not None else FOLDER_BATCH_MODE
-    folders, loose_files = group_files_by_folder(files, scan_dir)  # get both meaningful folders and loose files
+    folders, loose_files = group_files_by_folder([(f, parent) for f, _, parent in scanned], os.fspath(scan_dir))  # get both meaningful folders and loose files
 
     console.print(f"[dim]Found {len(folders)} folders with {MIN_FILES_FOR_FOLDER_GROUPING}+ files, {len(loose_files)} loose files[/dim]")  # show user what we found
 
-    if use_folder_mode and len(folders) >= 1:  # process meaningful folders first
-        folder_index = 0
-        for folder_path, folder_info in folders.items():
-            folder_index += 1
-            folder_files = folder_info["files"]
-            
-            # Parallel Metadata Extraction
-            with ThreadPoolExecutor() as executor:
-                folder_metas = list(executor.map(lambda f: get_file_metadata(f, True), folder_files))
-            
-            # Filter out None (in case of errors)
-            folder_metas = [m for m in folder_metas if m is not None]
-            if len(folder_metas) != len(folder_files):
-                # Filter files list to match metas
-                folder_files = [f for f, m in zip(folder_files, folder_metas) if m is not None]
-
-            sample_size = min(3, len(folder_files))
-            with console.status(f"[bold green]Analyzing folder: {folder_info['name']}...[/bold green]"):
-                ai_results = analyze_files_with_ai(folder_metas[:sample_size], series_tracker, category_tracker, memory_tracker)
+    # One set of worker threads for the whole run, instead of starting and stopping new ones for every folder and batch
+    move_queue = MoveQueue(on_moved=meta_cache.moved)  # file moves happen in the background; leaving the with-block waits for all of them (saved previews follow each moved file)
+    # analysis_pool gets the next batch ready (metadata + AI) while the user is still reviewing the current one; all AI calls go through it
+    analysis_pool = ThreadPoolExecutor(max_workers=1)  # shut down without waiting (see cleanup below), so quitting isn't held up by a prefetch
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool, move_queue, contextlib.ExitStack() as cleanup:
+        read_meta = lambda f: get_file_metadata(f, True, stat_cache=stat_cache, meta_cache=meta_cache,
+                                                include_image_b64=not is_screenshot(f.stem),  # no second stat: the scan already did it; screenshots skip vision, so no thumbnail
+                                                siblings_override=siblings.get(os.fspath(f.parent)))  # neighbors from the scan, not another folder listing
+
+        # Metadata is read in review order, a little ahead of the batch being loaded, so the pool keeps working across folder boundaries
+        if use_folder_mode and len(folders) >= 1:
+            review_order = [f for folder_info in folders.values() for f in folder_info["files"]] + loose_files
+        else:
+            review_order = files
+        position = {f: k for k, f in enumerate(review_order)}  # where each file sits in review_order
+        meta_futures = {}  # file -> its metadata read, only for files queued but not loaded yet
+        queued = 0  # everything before this spot in review_order has been queued or skipped (only the analysis thread changes it)
+        def queue_meta(start, until):
+            """Start reading metadata for review_order[start:until] (files already queued aren't queued again)."""
+            nonlocal queued
+            for f in review_order[max(start, queued):until]:
+                meta_futures[f] = pool.submit(read_meta, f)
+            queued = max(queued, min(until, len(review_order)))
+        def read_all(batch):
+            """(files, metas) for a batch, leaving out files whose metadata couldn't be read - one pass."""
+            if batch:
+                start = position[batch[0]]
+                for f in [f for f in meta_futures if position[f] < start]:
+                    meta_futures.pop(f).cancel()  # read ahead for folders the user quit out of - nobody will review them
+                queue_meta(start, position[batch[-1]] + 1 + METADATA_READ_AHEAD)  # this batch plus the next few files, not the whole scan (thumbnails add up)
+            pairs = [(f, m) for f in batch if (m := (meta_futures.pop(f, None) or pool.submit(read_meta, f)).result()) is not None]  # usually already done by the time we ask; pop lets it go once it's handed on
+            return [f for f, _ in pairs], [m for _, m in pairs]
+        queue_meta(0, METADATA_READ_AHEAD)  # get started while the first batch is being set up
+        cleanup.callback(pool.shutdown, wait=False, cancel_futures=True)  # on quit, don't read the files nobody will review
+        cleanup.callback(analysis_pool.shutdown, wait=False, cancel_futures=True)  # and don't wait on a batch nobody will see
+        ask_status = lambda batch: "[bold green]Asking AI...[/bold green]"  # clearer status message
+
+        def load_batch(batch, stop):  # runs in the background while the previous batch is being reviewed
+            batch, batch_meta = read_all(batch)  # files that vanished are already left out
+            if not batch or stop.is_set():
+                return batch, batch_meta, None, []
+            ai_results, messages = analyze_files_held(batch_meta, series_tracker, category_tracker, memory_tracker)
+            return batch, batch_meta, ai_results, messages
+
+        if use_folder_mode and len(folders) >= 1:  # process meaningful folders first
+            def load_folder(folder_info, stop):  # runs in the background while the previous folder is being reviewed
+                folder_files = folder_info["files"]
+
+                # Parallel Metadata Extraction (files whose metadata failed are left out, keeping files and metas in step)
+                folder_files, folder_metas = read_all(folder_files)
+                if stop.is_set():
+                    return folder_info, folder_files, folder_metas, None, []  # the user quit - skip the AI request
+
+                sample_size = min(3, len(folder_files))
+                ai_results, messages = analyze_files_held(folder_metas[:sample_size], series_tracker, category_tracker, memory_tracker)
+                for meta in folder_metas[sample_size:]:
+                    drop_thumbnail(meta)  # only the samples go to the AI now; the vision step makes the thumbnail again if it needs one
+                return folder_info, folder_files, folder_metas, ai_results, messages
+
+            folder_list = list(folders.values())
+            folder_status = lambda info: f"[bold green]Analyzing folder: {info['name']}...[/bold green]"
+            for folder_index, (folder_info, folder_files, folder_metas, ai_results, messages) in enumerate(prefetch(folder_list, load_folder, analysis_pool, folder_status), 1):
+                show_messages(messages)  # what the AI said while we were waiting on the user
             
-            if not ai_results:
-                 ai_results = [{"context": "Misc", "confidence": 0.3}]
-
-            action, context, _ = review_folder_batch(
-                folder_info, folder_metas, ai_results,
-                series_tracker, category_tracker, memory_tracker,
-                folder_index, len(folders)
-            )
-
-            if action == "quit": break
-            elif action == "skip":
-                stats["skipped"] += len(folder_files)
-                console.print(f"[blue]Skipped[/blue] {len(folder_files)} files")
-                continue
-            elif action in ("batch", "auto"):
-                console.print(f"\n[bold]Processing {len(folder_files)} files with context: {context}[/bold]")
-                batch_stats = batch_process_folder_files(folder_files, folder_metas, context, series_tracker, category_tracker, memory_tracker)
-                stats["moved"] += batch_stats["moved"]
-                stats["folder_batched"] += batch_stats["moved"]
-                console.print(f"[green]Done![/green] Moved {batch_stats['moved']} files\n")
-                time.sleep(0.5)
-            elif action == "individual":
-                 for j, (file_path, meta) in enumerate(zip(folder_files, folder_metas)):
-                    if j < len(ai_results): result = ai_results[j]
-                    else:
-                        with console.status(f"[bold green]Analyzing {file_path.name}...[/bold green]"):
-                             res = analyze_files_with_ai([meta], series_tracker, category_tracker, memory_tracker)
-                             result = res[0] if res else {"context": "Misc", "confidence": 0.3}
+                ai_results = [r or _FALLBACK_FOLDER_RESULT for r in ai_results or ()] or [_FALLBACK_FOLDER_RESULT]  # fallback only for samples the AI didn't answer
+
+                action, context, _ = review_folder_batch(
+                    folder_info, folder_metas, ai_results,
+                    series_tracker, category_tracker, memory_tracker,
+                    folder_index, len(folders)
+                )
+
+                if action == "quit": break
+                elif action == "skip":
+                    stats["skipped"] += len(folder_files)
+                    console.print(f"[blue]Skipped[/blue] {len(folder_files)} files")
+                    continue
+                elif action in ("batch", "auto"):
+                    console.print(f"\n[bold]Processing {len(folder_files)} files with context: {context}[/bold]")
+                    batch_stats = batch_process_folder_files(folder_files, folder_metas, context, series_tracker, category_tracker, memory_tracker, move_queue)
+                    stats["moved"] += batch_stats["moved"]
+                    stats["folder_batched"] += batch_stats["moved"]
+                    console.print(f"[green]Done![/green] Moved {batch_stats['moved']} files\n")
+                    time.sleep(0.5)
+                elif action == "individual":
+                     for j, (file_path, meta) in enumerate(zip(folder_files, folder_metas)):
+                        if j < len(ai_results): result = ai_results[j]
+                        else:
+                            with console.status(f"[bold green]Analyzing {file_path.name}...[/bold green]"):
+                                 # On the analysis thread, so it never runs at the same time as the next folder's prefetch (they share pattern_rules)
+                                 res, messages = analysis_pool.submit(analyze_files_held, [meta], series_tracker, category_tracker, memory_tracker).result()
+                            show_messages(messages)
+                            result = res[0] if res and res[0] else _FALLBACK_FOLDER_RESULT
                     
-                    cont, act = review_single_file(file_path, meta, result, j+1, len(folder_files), series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history)
-                    if act in stats: stats[act] += 1
-                    if not cont: break
-
-        # After processing folders, handle loose files individually
-        if loose_files:  # process loose files if any remain
-            console.print(f"\n[bold]Processing {len(loose_files)} loose files individually...[/bold]")
-            for i in range(0, len(loose_files), batch_size):
-                batch = loose_files[i : i + batch_size]
-
-                with ThreadPoolExecutor() as executor:
-                    batch_meta = list(executor.map(lambda f: get_file_metadata(f, True), batch))
-
-                # Filter None
-                batch = [b for b, m in zip(batch, batch_meta) if m]
-                batch_meta = [m for m in batch_meta if m]
-                if not batch: continue
+                        cont, act = review_single_file(file_path, meta, result, j+1, len(folder_files), series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history, move_queue)
+                        if act in stats: stats[act] += 1
+                        if not cont: break
+                memory_tracker.flush()  # save what this folder taught us (one write per folder, not per file)
+                move_queue.poll()  # report any of this folder's moves that failed, now rather than at the very end
+
+            # After processing folders, handle loose files individually
+            if loose_files:  # process loose files if any remain
+                console.print(f"\n[bold]Processing {len(loose_files)} loose files individually...[/bold]")
+                batches = [loose_files[i : i + batch_size] for i in range(0, len(loose_files), batch_size)]
+                for n, (batch, batch_meta, ai_results, messages) in enumerate(prefetch(batches, load_batch, analysis_pool, ask_status)):
+                    i = n * batch_size
+                    show_messages(messages)
+                    if not batch: continue
+
+                    if not ai_results or len(ai_results) != len(batch):
+                        ai_results = [None] * len(batch)  # nothing usable came back, so every file falls back
+
+                    for j, (file_path, meta, result) in enumerate(zip(batch, batch_meta, ai_results)):
+                        result = result or _FALLBACK_RESULT  # the same read-only answer for each file the AI couldn't do
+                        file_index = i + j + 1
+                        cont, act = review_single_file(file_path, meta, result, file_index, len(loose_files), series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history, move_queue)
+                        if act == "moved":  # one check per known outcome instead of "is it in stats?" every time
+                            stats["moved"] += 1
+                            if result.get("confidence", 0) >= HIGH_CONFIDENCE_THRESHOLD:
+                                stats["auto_accepted"] += 1
+                        elif act != "quit":
+                            stats[act] += 1  # "trashed" or "skipped"
+                        if not cont: return
+                    memory_tracker.flush()  # one save per batch
+                    move_queue.poll()  # report failed moves from this batch
 
-                with console.status("[bold green]Asking AI...[/bold green]"):  # clearer status message
-                    ai_results = analyze_files_with_ai(batch_meta, series_tracker, category_tracker, memory_tracker)
+        else:
+            # File batch mode (fallback) - process all files when folder mode is disabled
+            batches = [files[i : i + batch_size] for i in range(0, total, batch_size)]
+            for n, (batch, batch_meta, ai_results, messages) in enumerate(prefetch(batches, load_batch, analysis_pool, ask_status)):
+                i = n * batch_size
+                show_messages(messages)
+                if not batch: continue
 
                 if not ai_results or len(ai_results) != len(batch):
-                    ai_results = [{"confidence": 0.3, "context": "Review", "description": "file"} for _ in batch]
+                    ai_results = [None] * len(batch)  # nothing usable came back, so every file falls back
 
                 for j, (file_path, meta, result) in enumerate(zip(batch, batch_meta, ai_results)):
+                    result = result or _FALLBACK_RESULT  # the same read-only answer for each file the AI couldn't do
                     file_index = i + j + 1
-                    cont, act = review_single_file(file_path, meta, result, file_index, len(loose_files), series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history)
-                    if act == "moved" and result.get("confidence", 0) >= HIGH_CONFIDENCE_THRESHOLD:
-                        stats["auto_accepted"] += 1
-                    if act in stats: stats[act] += 1
+                    cont, act = review_single_file(file_path, meta, result, file_index, total, series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history, move_queue)
+                    if act == "moved":  # one check per known outcome instead of "is it in stats?" every time
+                        stats["moved"] += 1
+                        if result.get("confidence", 0) >= HIGH_CONFIDENCE_THRESHOLD:
+                            stats["auto_accepted"] += 1
+                    elif act != "quit":
+                        stats[act] += 1  # "trashed" or "skipped"
                     if not cont: return
+                memory_tracker.flush()  # one save per batch
+                move_queue.poll()  # report failed moves from this batch
 
-    else:
-        # File batch mode (fallback) - process all files when folder mode is disabled
-        for i in range(0, total, batch_size):
-            batch = files[i : i + batch_size]
-            
-            with ThreadPoolExecutor() as executor:
-                batch_meta = list(executor.map(lambda f: get_file_metadata(f, True), batch))
-            
-            # Filter None
-            batch = [b for b, m in zip(batch, batch_meta) if m]
-            batch_meta = [m for m in batch_meta if m]
-            if not batch: continue
-
-            with console.status("[bold green]Asking AI...[/bold green]"):  # clearer status message
-                ai_results = analyze_files_with_ai(batch_meta, series_tracker, category_tracker, memory_tracker)
+    # Moves that failed in the background were already counted when the user chose them - take them back out
+    stats["moved"] -= move_queue.failed["moved"] + move_queue.failed["folder_batched"]
+    stats["folder_batched"] -= move_queue.failed["folder_batched"]
+    stats["trashed"] -= move_queue.failed["trashed"]
 
-            if not ai_results or len(ai_results) != len(batch):
-                ai_results = [{"confidence": 0.3, "context": "Review", "description": "file"} for _ in batch]
-
-            for j, (file_path, meta, result) in enumerate(zip(batch, batch_meta, ai_results)):
-                file_index = i + j + 1
-                cont, act = review_single_file(file_path, meta, result, file_index, total, series_tracker, auto_accept, category_tracker, memory_tracker, dry_run, undo_history)
-                if act == "moved" and result.get("confidence", 0) >= HIGH_CONFIDENCE_THRESHOLD:
-                    stats["auto_accepted"] += 1
-                if act in stats: stats[act] += 1
-                if not cont: return
+    meta_cache.flush()  # save new previews now (atexit also catches the early returns above)
 
     # End session and get accuracy stats
     memory_tracker.end_session()
@@ -690,6 +793,8 @@ def process_files(scan_dir, batch_size=3, recursive=False, auto_accept=True, fol
         f"[red]Trashed:[/red] {stats['trashed']}\n"
         f"[blue]Skipped:[/blue] {stats['skipped']}\n\n"
     )
+    if move_queue.errors:
+        summary_text += f"[red]Failed moves:[/red] {len(move_queue.errors)} (see errors above)\n\n"  # moves that went wrong in the background
 
     # Add accuracy stats if available
     if accuracy_stats.get("total_files", 0) > 0:
@@ -718,7 +823,19 @@ def process_files(scan_dir, batch_size=3, recursive=False, auto_accept=True, fol
 
         console.print("\n[dim]These patterns are automatically applied to future files![/dim]")
 
+def _exit_on_signal(signum, frame):
+    """Turn SIGTERM/SIGHUP into a normal exit, so with-blocks unwind and the atexit saves still run"""
+    raise SystemExit(128 + signum)  # the usual "killed by signal N" exit code
+
+def install_exit_handlers():
+    """By default these signals kill Python without running atexit (e.g. when the Terminal window is closed)"""
+    for name in ("SIGTERM", "SIGHUP"):
+        sig = getattr(signal, name, None)  # Windows has no SIGHUP
+        if sig is not None:
+            signal.signal(sig, _exit_on_signal)
+
 def main():
+    install_exit_handlers()  # queued cache rows, metadata and memory get saved even if we're killed
     parser = argparse.ArgumentParser(
         description="AI-powered file organizer with smart naming",
         epilog="Run without arguments for interactive mode"  # tell users about interactive mode
@@ -732,6 +849,7 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Preview changes without moving files")
     parser.add_argument("--undo", action="store_true", help="Undo the last session")
     parser.add_argument("--show-stats", action="store_true", help="Show accuracy statistics")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY, help=f"Worker threads for reading files (default: {MAX_CONCURRENCY})")  # how many files we read at once
     args = parser.parse_args()
 
     # Handle undo command
@@ -790,7 +908,7 @@ def main():
         auto_accept = not args.no_auto_accept
 
     # Run the organizer with chosen settings
-    process_files(scan_path, recursive=True, auto_accept=auto_accept, folder_mode=folder_mode, dry_run=args.dry_run if hasattr(args, 'dry_run') else False)
+    process_files(scan_path, recursive=True, auto_accept=auto_accept, folder_mode=folder_mode, dry_run=args.dry_run if hasattr(args, 'dry_run') else False, max_concurrency=max(1, args.max_concurrency))  # at least one worker
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+import os
+import errno
+import shutil
+import queue
+import functools
+from collections import Counter
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+
+from .utils import get_unique_path
+
+console = Console()
+
+_made_folders = set()  # destination folders we've already created this run
+
+def ensure_folder(folder):
+    """mkdir -p, but only the first time we see each folder (after that we know it's there)"""
+    key = str(folder)
+    if key not in _made_folders:
+        folder.mkdir(parents=True, exist_ok=True)
+        _made_folders.add(key)
+
+def reset_made_folders():
+    """Forget which folders were created, so a new run checks the disk again"""
+    _made_folders.clear()
+
+@functools.lru_cache(maxsize=1024)
+def _folder_device(folder):
+    """Which disk a folder lives on (looked up once per folder; every file in a folder is on the same disk)"""
+    return os.stat(folder).st_dev
+
+def fast_move(source, destination):
+    """Rename in place when source and destination are on the same disk, otherwise let shutil copy it over"""
+    source, destination = os.fspath(source), os.fspath(destination)
+    if _folder_device(os.path.dirname(source) or ".") == _folder_device(os.path.dirname(destination) or "."):
+        try:
+            os.replace(source, destination)  # one rename instead of shutil's extra checks (names are already unique)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:  # EXDEV = "different disk after all" (e.g. bind mounts) - fall back below
+                raise
+    shutil.move(source, destination)
+
+class MoveQueue:
+    """Moves files on background threads so reviewing the next file never waits for the disk"""
+
+    def __init__(self, max_workers=4, on_moved=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.on_moved = on_moved  # on_moved(source, destination) for every move that works, on the worker thread (e.g. MetadataCache.moved)
+        self._pending = set()  # futures of moves that haven't been handled by poll() yet
+        self._finished = queue.SimpleQueue()  # (future, source, destination, label) put here by each move as it completes
+        self._reserved = set()  # destinations promised to moves that may not have happened yet
+        self.errors = []  # (source, error) for moves that failed
+        self.failed = Counter()  # failed moves per label ("moved", "trashed"), so the summary doesn't count them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wait()
+        self._pool.shutdown()
+
+    def unique_path(self, folder, filename):
+        """Pick a free destination name, counting names already promised to queued moves as taken"""
+        path = get_unique_path(folder, filename, taken=self._reserved)
+        self._reserved.add(path)  # so the next file with the same name gets (1), (2), ...
+        return path
+
+    def submit(self, source, destination, on_done=None, label="moved"):
+        """Queue a move. on_done(source, destination) runs on the worker thread the moment the move succeeds
+        (so it must be thread-safe); failures are reported by the next poll() on the main thread."""
+        self.poll()  # deal with moves that finished since last time before adding another
+        future = self._pool.submit(self._move, source, destination, on_done)
+        self._pending.add(future)
+        future.add_done_callback(lambda f: self._finished.put((f, source, destination, label)))  # hand it back to the main thread
+
+    def _move(self, source, destination, on_done):
+        fast_move(source, destination)
+        if self.on_moved:
+            self.on_moved(source, destination)
+        if on_done:
+            on_done(source, destination)  # e.g. record it for undo right away, so a crash later can't lose it
+
+    def poll(self):
+        """Handle every move that has finished so far (report failures); returns how many of them failed"""
+        failed = 0
+        while True:
+            try:
+                future, source, destination, label = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(future)
+            self._reserved.discard(destination)  # it's on disk now (or failed), so exists() tells the truth again
+            error = future.exception()
+            if error is not None:
+                console.print(f"[red]✗ Could not move[/red] {source.name}: {error}")
+                self.errors.append((source, error))
+                self.failed[label] += 1
+                failed += 1
+        return failed
+
+    def wait(self):
+        """Block until every queued move has finished, report failures, and return how many failed"""
+        futures.wait(list(self._pending))
+        return self.poll()
+
+def move_file(source, folder, filename, move_queue=None, on_done=None, label="moved"):
+    """Move source into folder under a free name and return the new path (queued in the background if move_queue is given)"""
+    if move_queue is None:
+        final_path = get_unique_path(folder, filename)
+        fast_move(source, final_path)
+        if on_done:
+            on_done(source, final_path)
+        return final_path
+    final_path = move_queue.unique_path(folder, filename)
+    move_queue.submit(source, final_path, on_done, label)  # label: which summary count this move belongs to
+    return final_path
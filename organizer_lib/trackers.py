@@ -1,26 +1,114 @@
-import json
+import os
+import re
+import sys
+import time
+import atexit
+import functools
 import datetime
-from pathlib import Path
+import heapq
+import operator
+import itertools
+from collections import Counter, defaultdict, deque
 from rich.console import Console
 
 from .config import PROJECT_ROOT
+from . import jsonio  # orjson when available, json otherwise
 
 console = Console()
 
+RECENT_CORRECTION_WINDOW = 50  # get_relevant_context only looks at this many of the newest corrections
+# How much history memory.json keeps; deque(maxlen=...) drops the oldest entry by itself on append
+HISTORY_LIMITS = {"corrections": 200, "description_patterns": 100}
+SESSION_LIMIT = 20
+TIMESTAMP_REFRESH_SECONDS = 1.0  # corrections this close together get the same timestamp
+LOG_COMPACT_BYTES = 1024 * 1024  # memory.jsonl bigger than this is folded into memory.json straight away
+
+def _intern_keys(correction):
+    """Swap a correction's folder/extension/choice for the one shared copy of each string (they repeat a lot and are used as dict keys)."""
+    for key in ("folder", "extension", "user_chose"):
+        value = correction.get(key)
+        if type(value) is str:  # sys.intern only takes exact str (the AI's answers could be anything)
+            correction[key] = sys.intern(value)
+
+def _tail(items, n):
+    """The last n items of a list or deque, as a new list (deques can't be sliced)."""
+    return list(itertools.islice(items, max(len(items) - n, 0), None))
+
+# Series pattern in filenames: letters followed by numbers (hw1, lecture2), compiled once.
+# This also covers underscore (scan_001) and hyphen (page-01) names: "_" and "-" are non-digits
+# too, so whenever those forms match this one already has, and it used to be tried first.
+_SERIES_PATTERN = re.compile(r'(\D+?)(\d+)', re.IGNORECASE)
+
 class MemoryTracker:
     """Remembers user corrections to improve future AI suggestions."""
 
     def __init__(self):
         self.memory_file = PROJECT_ROOT / "memory.json"
+        self.log_file = PROJECT_ROOT / "memory.jsonl"  # corrections since the last full save, one JSON object per line
+        self._log = None  # opened the first time a correction is made
+        self._dirty = False  # True when memory has changes that aren't in memory.json yet
+        self._log_pending = False  # True when memory.jsonl has lines a durable flush hasn't covered yet
+        # Top 3 (category, count) for each folder / extension, kept up to date as corrections come in
+        self._top_patterns = {"folder_patterns": {}, "extension_patterns": {}}
+        self._pattern_order = {"folder_patterns": {}, "extension_patterns": {}}  # category -> its place in the counts dict, for breaking ties
+        # Recent corrections filed by folder and by extension, as (number, correction) - newest on the right
+        self._by_folder = defaultdict(lambda: deque(maxlen=RECENT_CORRECTION_WINDOW))
+        self._by_ext = defaultdict(lambda: deque(maxlen=RECENT_CORRECTION_WINDOW))
+        self._correction_count = 0  # numbers each correction, so we know which are among the last 50
+        self._clock = (None, 0.0)  # (timestamp text, when it was made) - reused for corrections made close together
+        self._corrections_version = 0  # goes up with every correction, so cached text knows when it's stale
+        self._prompt_history = (None, "")  # (version, correction-history part of the prompt)
         self.memory = self._load_memory()
+        self._timings = {k: tuple(v) for k, v in self.memory.get("timing_patterns", {}).items()}  # tuples made once, not per lookup
+        atexit.register(functools.partial(self.flush, durable=True))  # don't lose changes if the program quits early
 
     def _load_memory(self):
+        memory = None
         if self.memory_file.exists():
             try:
-                with open(self.memory_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
+                memory = jsonio.load_file(self.memory_file)  # big files are memory-mapped instead of read into a copy
+            except (ValueError, IOError):
                 pass
+        defaults = self._empty_memory()
+        if memory is None:
+            memory = defaults
+        for key, value in defaults.items():
+            memory.setdefault(key, value)  # files from older versions may be missing newer sections
+        for key, value in defaults["stats"].items():
+            memory["stats"].setdefault(key, value)  # every counter exists, so updates can just use +=
+        for key, limit in HISTORY_LIMITS.items():
+            memory[key] = deque(memory.get(key, []), maxlen=limit)  # trimmed to size right here
+        memory["stats"]["sessions"] = deque(memory["stats"]["sessions"], maxlen=SESSION_LIMIT)
+        self.memory = memory
+        for kind in self._top_patterns:
+            for key in memory.get(kind, {}):
+                self._update_top(kind, key)
+        for correction in memory["corrections"]:
+            _intern_keys(correction)
+            self._index_correction(correction)
+        self._replay_log()  # add corrections made after memory.json was last written
+        return self.memory
+
+    def _replay_log(self):
+        """Re-apply corrections from memory.jsonl that are newer than memory.json."""
+        try:
+            with open(self.log_file, 'rb') as f:
+                lines = f.readlines()
+        except IOError:
+            return
+        self._log_pending = bool(lines)  # leftovers get cleared by the next durable flush
+        saved_through = self.memory.get("log_through", "")  # timestamp of the last correction memory.json already has
+        for line in lines:
+            try:
+                entry = jsonio.loads(line)
+            except ValueError:
+                continue  # half-written line from a crash - skip it
+            if entry.get("timestamp", "") > saved_through:
+                original_stem = entry.pop("original_stem", "")
+                self._apply_correction(entry, original_stem)
+                self._dirty = True
+
+    def _empty_memory(self):
         return {
             "corrections": [],
             "folder_patterns": {},
@@ -37,16 +125,74 @@ class MemoryTracker:
             }
         }
 
-    def _save_memory(self):
+    def _save_memory(self, durable=False):
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump(self.memory, f, indent=2)
-        except IOError as e:
+            jsonio.write_file(self.memory_file, self._as_json(), durable)  # fsync only at session end / exit
+        except (IOError, TypeError) as e:
             console.print(f"[dim]Warning: Could not save memory: {e}[/dim]")
+            return False
+        return True
+
+    def _as_json(self):
+        """memory with its deques turned back into lists, ready to be written as JSON."""
+        data = dict(self.memory)
+        for key in HISTORY_LIMITS:
+            data[key] = list(self.memory[key])
+        data["stats"] = dict(self.memory["stats"], sessions=list(self.memory["stats"]["sessions"]))
+        return data
+
+    def _timestamp(self):
+        """Current time as ISO text, re-read at most once a second (corrections that close together share it)."""
+        text, made_at = self._clock
+        now = time.monotonic()
+        if text is None or now - made_at >= TIMESTAMP_REFRESH_SECONDS:
+            text = datetime.datetime.now().isoformat()
+            self._clock = (text, now)
+        return text
+
+    def flush(self, durable=False):
+        """Write memory.json if anything changed.
+
+        Regular flushes skip fsync; the corrections log still holds everything since the last
+        durable flush, so it's only emptied once memory.json has been synced to disk (durable=True).
+        """
+        if not self._dirty:
+            if durable and self._log_pending:
+                self._truncate_log()
+            return
+        self._clock = (None, 0.0)  # later corrections must get a newer timestamp than log_through, or a replay would skip them
+        if self.memory["corrections"]:
+            self.memory["log_through"] = self.memory["corrections"][-1]["timestamp"]  # lets a later load skip log lines we've saved
+        if not self._save_memory(durable):
+            return
+        self._dirty = False
+        if durable:
+            self._truncate_log()
+
+    def _truncate_log(self):
+        try:
+            if self._log is not None:
+                self._log.truncate(0)  # append mode keeps writing at the (new) end
+            elif self.log_file.exists():
+                open(self.log_file, 'w').close()
+            self._log_pending = False
+        except IOError:
+            pass  # leftover lines are older than log_through, so they won't be applied twice
+
+    def _append_log(self, entry):
+        """Add one correction to memory.jsonl (a single small write, not a rewrite of everything)."""
+        try:
+            if self._log is None:
+                self._log = open(self.log_file, 'ab')
+            self._log.write(jsonio.dumps(entry) + b"\n")
+            self._log.flush()  # hand it to the OS now, so a crash doesn't lose it
+            self._log_pending = True
+        except (IOError, TypeError):
+            pass
 
     def record_correction(self, file_meta, ai_suggestion, user_choice, correction_type):
         correction = {
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": self._timestamp(),
             "type": correction_type,
             "filename": file_meta.get("filename", ""),
             "folder": file_meta.get("folder_name", ""),
@@ -55,70 +201,107 @@ class MemoryTracker:
             "user_chose": user_choice,
             "content_preview": file_meta.get("content_preview", "")[:200]
         }
+        original_stem = file_meta.get("original_stem", "")
+        self._append_log({**correction, "original_stem": original_stem})  # saved right away, cheaply
+        self._apply_correction(correction, original_stem)
+        self._dirty = True  # memory.json gets rewritten on the next flush(), not now
+        if self._log is not None and self._log.tell() > LOG_COMPACT_BYTES:
+            self.flush(durable=True)  # log got big (very long session) - fold it into memory.json now
+
+    def _apply_correction(self, correction, original_stem):
+        """Update the learned patterns for one correction (used when recording and when replaying the log)."""
+        _intern_keys(correction)
+        correction_type = correction["type"]
+        user_choice = correction["user_chose"]
+        ai_suggestion = correction["ai_suggested"]
         self.memory["corrections"].append(correction)
+        self._index_correction(correction)
+        self._corrections_version += 1
         self.memory["stats"]["corrections_made"] += 1
 
         if correction_type == "context":
-            folder = file_meta.get("folder_name", "")
+            folder = correction.get("folder", "")
             if folder:
                 if folder not in self.memory["folder_patterns"]:
                     self.memory["folder_patterns"][folder] = {}
                 if user_choice not in self.memory["folder_patterns"][folder]:
                     self.memory["folder_patterns"][folder][user_choice] = 0
                 self.memory["folder_patterns"][folder][user_choice] += 1
+                self._bump_top("folder_patterns", folder, user_choice)  # counts only change here, so the top 3 is updated here too
 
-            ext = file_meta.get("extension", "")
+            ext = correction.get("extension", "")
             if ext:
                 if ext not in self.memory["extension_patterns"]:
                     self.memory["extension_patterns"][ext] = {}
                 if user_choice not in self.memory["extension_patterns"][ext]:
                     self.memory["extension_patterns"][ext][user_choice] = 0
                 self.memory["extension_patterns"][ext][user_choice] += 1
+                self._bump_top("extension_patterns", ext, user_choice)
 
         elif correction_type == "description":
             self.memory["description_patterns"].append({
-                "original_stem": file_meta.get("original_stem", ""),
+                "original_stem": original_stem,
                 "ai_suggested": ai_suggestion,
                 "user_chose": user_choice,
-                "folder": file_meta.get("folder_name", "")
+                "folder": correction.get("folder", "")
             })
-            if len(self.memory["description_patterns"]) > 100:
-                self.memory["description_patterns"] = self.memory["description_patterns"][-100:]
 
         elif correction_type == "timestamp":
             pass
 
-        if len(self.memory["corrections"]) > 200:
-            self.memory["corrections"] = self.memory["corrections"][-200:]
-
-        self._save_memory()
+    def _index_correction(self, correction):
+        """File a correction under its folder and extension for get_relevant_context."""
+        entry = (self._correction_count, correction)
+        self._correction_count += 1
+        self._by_folder[correction.get("folder", "")].append(entry)
+        self._by_ext[correction.get("extension", "")].append(entry)
 
     def record_timing_for_context(self, context, year, season):
-        if "timing_patterns" not in self.memory:
-            self.memory["timing_patterns"] = {}
         self.memory["timing_patterns"][context] = [year, season]
-        self._save_memory()
+        self._timings[context] = (year, season)  # keep the lookup copy in step
+        self._dirty = True
+
+    def _update_top(self, kind, key):
+        """Recompute the top 3 categories for one folder or extension (kind is "folder_patterns" or "extension_patterns")."""
+        patterns = self.memory[kind][key]
+        self._pattern_order[kind][key] = {category: i for i, category in enumerate(patterns)}
+        # A new list each time, so readers on other threads always see a complete one
+        self._top_patterns[kind][key] = heapq.nlargest(3, patterns.items(), key=operator.itemgetter(1))
+
+    def _bump_top(self, kind, key, choice):
+        """Fold one category's new count into the saved top 3, without rescanning the folder's other counts.
+
+        Ties go to the category that was picked first, the same order nlargest gives _update_top on the next load.
+        """
+        count = self.memory[kind][key][choice]
+        order = self._pattern_order[kind].setdefault(key, {})
+        order.setdefault(choice, len(order))  # a new category goes at the end, like it does in the counts dict
+        # Only this category's count went up, so nothing outside the old top 3 can pass it
+        top = [entry for entry in self._top_patterns[kind].get(key, ()) if entry[0] != choice]
+        top.append((choice, count))
+        top.sort(key=lambda entry: (-entry[1], order[entry[0]]))  # most picked first, then first picked
+        self._top_patterns[kind][key] = top[:3]  # a brand new list, same as _update_top
+
+    def get_best_folder_pattern(self, folder):
+        """Return the (category, count) the user picked most for this folder, or None"""
+        top = self._top_patterns["folder_patterns"].get(folder)
+        return top[0] if top else None
 
     def get_timing_for_context(self, context):
-        if "timing_patterns" not in self.memory:
-            return None
-        timing = self.memory.get("timing_patterns", {}).get(context)
-        if timing:
-            return tuple(timing)
-        return None
+        return self._timings.get(context) or None  # same "or None" as before, for an empty saved timing
 
     def record_acceptance(self, file_meta, was_auto=False, was_pattern=False, was_cached=False):
         """Record that a file was accepted (with optional flags for tracking)"""
         self.memory["stats"]["total_processed"] += 1
 
         if was_auto:  # file was auto-accepted (high confidence)
-            self.memory["stats"]["auto_accepted"] = self.memory["stats"].get("auto_accepted", 0) + 1
+            self.memory["stats"]["auto_accepted"] += 1
         if was_pattern:  # file was matched by pattern rule
-            self.memory["stats"]["pattern_matched"] = self.memory["stats"].get("pattern_matched", 0) + 1
+            self.memory["stats"]["pattern_matched"] += 1
         if was_cached:  # file was served from cache
-            self.memory["stats"]["cache_hits"] = self.memory["stats"].get("cache_hits", 0) + 1
+            self.memory["stats"]["cache_hits"] += 1
 
-        self._save_memory()
+        self._dirty = True  # counted in memory; written out by flush()
 
     def start_session(self):
         """Start a new session for tracking stats"""
@@ -143,18 +326,12 @@ class MemoryTracker:
             else:
                 self.current_session["accuracy"] = 0
 
-            # Save session to history
-            if "sessions" not in self.memory["stats"]:
-                self.memory["stats"]["sessions"] = []
-
+            # Save session to history (only the last 20 are kept, to avoid bloat)
             self.memory["stats"]["sessions"].append(self.current_session)
 
-            # Keep only last 20 sessions to avoid bloat
-            if len(self.memory["stats"]["sessions"]) > 20:
-                self.memory["stats"]["sessions"] = self.memory["stats"]["sessions"][-20:]
-
-            self._save_memory()
+            self._dirty = True
             delattr(self, 'current_session')
+        self.flush(durable=True)  # end of a session is the one save that's synced to disk
 
     def get_accuracy_stats(self):
         """Get overall and recent accuracy statistics"""
@@ -167,7 +344,7 @@ class MemoryTracker:
         corrections = stats.get("corrections_made", 0)
         overall_accuracy = ((total - corrections) / total) * 100
 
-        recent_sessions = stats.get("sessions", [])[-5:]  # last 5 sessions
+        recent_sessions = _tail(stats["sessions"], 5)  # last 5 sessions
 
         return {
             "overall_accuracy": round(overall_accuracy, 1),
@@ -197,11 +374,10 @@ class MemoryTracker:
         # Look for description patterns (similar stems → same category)
         desc_patterns = self.memory.get("description_patterns", [])
         if len(desc_patterns) >= 5:  # need some data to detect patterns
-            # Group by similar stems
-            from collections import defaultdict
-            stem_groups = defaultdict(list)
+            # Group by similar stems, counting how often each correction was chosen
+            stem_groups = defaultdict(Counter)
 
-            for pattern in desc_patterns[-20:]:  # look at recent 20
+            for pattern in _tail(desc_patterns, 20):  # look at recent 20
                 original = pattern.get("original_stem", "").lower()
                 user_chose = pattern.get("user_chose", "")
 
@@ -209,17 +385,19 @@ class MemoryTracker:
                 words = original.split("_")
                 if words:
                     key_word = words[0]  # first word as key
-                    stem_groups[key_word].append(user_chose)
+                    stem_groups[key_word][user_chose] += 1
 
             # Find repeated patterns
             for key_word, descriptions in stem_groups.items():
-                if len(descriptions) >= 3 and len(set(descriptions)) == 1:  # same correction 3+ times
-                    suggestions.append({
-                        "type": "filename_pattern",
-                        "pattern": f"Files starting with '{key_word}' → '{descriptions[0]}'",
-                        "confidence": len(descriptions),
-                        "reason": f"Detected pattern in {len(descriptions)} files"
-                    })
+                if len(descriptions) == 1:  # always the same correction...
+                    description, count = next(iter(descriptions.items()))
+                    if count >= 3:  # ...and at least 3 times
+                        suggestions.append({
+                            "type": "filename_pattern",
+                            "pattern": f"Files starting with '{key_word}' → '{description}'",
+                            "confidence": count,
+                            "reason": f"Detected pattern in {count} files"
+                        })
 
         return suggestions[:5]  # return top 5 suggestions
 
@@ -228,26 +406,33 @@ class MemoryTracker:
         folder = file_meta.get("folder_name", "")
         ext = file_meta.get("extension", "")
 
-        if folder and folder in self.memory["folder_patterns"]:
-            patterns = self.memory["folder_patterns"][folder]
-            sorted_patterns = sorted(patterns.items(), key=lambda x: x[1], reverse=True)[:3]
+        if folder and folder in self._top_patterns["folder_patterns"]:
+            sorted_patterns = self._top_patterns["folder_patterns"][folder]  # already worked out when the counts changed
             context["folder_hints"] = [f"{cat} (used {count}x)" for cat, count in sorted_patterns]
 
-        if ext and ext in self.memory["extension_patterns"]:
-            patterns = self.memory["extension_patterns"][ext]
-            sorted_patterns = sorted(patterns.items(), key=lambda x: x[1], reverse=True)[:3]
+        if ext and ext in self._top_patterns["extension_patterns"]:
+            sorted_patterns = self._top_patterns["extension_patterns"][ext]
             context["extension_hints"] = [f"{cat} (used {count}x)" for cat, count in sorted_patterns]
 
-        for correction in reversed(self.memory["corrections"][-50:]):
-            if correction["folder"] == folder or correction["extension"] == ext:
-                context["recent_corrections"].append({
-                    "type": correction["type"],
-                    "filename": correction["filename"],
-                    "ai_suggested": correction["ai_suggested"],
-                    "user_chose": correction["user_chose"]
-                })
-            if len(context["recent_corrections"]) >= 5:
+        # Newest first from both indexes, only looking at the last 50 corrections overall
+        oldest_allowed = self._correction_count - RECENT_CORRECTION_WINDOW
+        matches = heapq.merge(
+            reversed(self._by_folder.get(folder, ())), reversed(self._by_ext.get(ext, ())),
+            key=operator.itemgetter(0), reverse=True,
+        )
+        last_seen = None
+        for number, correction in matches:
+            if number < oldest_allowed or len(context["recent_corrections"]) >= 5:
                 break
+            if number == last_seen:
+                continue  # matched on both folder and extension - only list it once
+            last_seen = number
+            context["recent_corrections"].append({
+                "type": correction["type"],
+                "filename": correction["filename"],
+                "ai_suggested": correction["ai_suggested"],
+                "user_chose": correction["user_chose"]
+            })
 
         return context
 
@@ -255,15 +440,26 @@ class MemoryTracker:
         if not self.memory["corrections"]:
             return ""
 
+        version, history = self._prompt_history
+        if version != self._corrections_version:  # only rebuilt after a new correction, not for every batch
+            version = self._corrections_version  # read first: a correction made while we build marks this stale
+            history = self._build_prompt_history()
+            self._prompt_history = (version, history)
+
+        stats = self.memory["stats"]  # these counts change with every file, so they're always read fresh
+        return f"{history}\n\nStats: {stats['total_processed']} files processed, {stats['corrections_made']} corrections made"
+
+    def _build_prompt_history(self):
+        """Folder mappings and recent corrections for get_prompt_context."""
         prompt_parts = ["\nUSER CORRECTION HISTORY (learn from these to improve suggestions):"]
 
         if self.memory["folder_patterns"]:
             prompt_parts.append("\nFolder → Category mappings (user preferences):")
-            for folder, patterns in list(self.memory["folder_patterns"].items())[:10]:
-                top_cat = max(patterns.items(), key=lambda x: x[1])
+            for folder, top in list(self._top_patterns["folder_patterns"].items())[:10]:  # list() copies, so a correction saved meanwhile can't break the loop
+                top_cat = top[0]  # the favorite was worked out when the counts changed
                 prompt_parts.append(f"  - Files from '{folder}' → usually '{top_cat[0]}' ({top_cat[1]}x)")
 
-        recent = self.memory["corrections"][-10:]
+        recent = _tail(self.memory["corrections"], 10)
         if recent:
             prompt_parts.append("\nRecent user corrections (AI was wrong, user fixed):")
             for corr in recent:
@@ -272,9 +468,6 @@ class MemoryTracker:
                 elif corr["type"] == "description":
                     prompt_parts.append(f"  - '{corr['filename']}': AI desc '{corr['ai_suggested']}' → user preferred '{corr['user_chose']}'")
 
-        stats = self.memory["stats"]
-        prompt_parts.append(f"\nStats: {stats['total_processed']} files processed, {stats['corrections_made']} corrections made")
-
         return "\n".join(prompt_parts)
 
 
@@ -286,29 +479,18 @@ class SeriesTracker:
 
     def detect_series_from_filenames(self, filenames):
         """Detect if files form a series by analyzing filenames"""
-        import re
-
-        # Look for common series patterns in filenames
-        patterns = [
-            r'(\D+?)(\d+)',  # letters followed by numbers (hw1, lecture2)
-            r'(\D+)_(\d+)',  # underscore separated (scan_001)
-            r'(\D+)-(\d+)',  # hyphen separated (page-01)
-        ]
-
         series_groups = {}  # group files by detected series name
 
         for filename in filenames:
-            stem = Path(filename).stem if isinstance(filename, str) else filename
-            for pattern in patterns:
-                match = re.search(pattern, stem, re.IGNORECASE)
-                if match:
-                    series_name = match.group(1).strip('_- ')  # series name (e.g., "hw", "lecture")
-                    number = match.group(2)  # the number part
-
-                    if series_name not in series_groups:
-                        series_groups[series_name] = []
-                    series_groups[series_name].append((stem, int(number)))
-                    break  # found a match, don't try other patterns
+            stem = os.path.splitext(os.path.basename(filename))[0] if isinstance(filename, str) else filename  # same as Path(filename).stem, without making a Path
+            match = _SERIES_PATTERN.search(stem)  # one search per name instead of up to three
+            if match:
+                series_name = match.group(1).strip('_- ')  # series name (e.g., "hw", "lecture")
+                number = match.group(2)  # the number part
+
+                if series_name not in series_groups:
+                    series_groups[series_name] = []
+                series_groups[series_name].append((stem, int(number)))
 
         # Filter out "series" with only 1 file (not really a series)
         real_series = {k: v for k, v in series_groups.items() if len(v) >= 2}
@@ -317,15 +499,15 @@ class SeriesTracker:
 
     def register_file(self, series_name, file_path):
         if series_name not in self.series:
-            self.series[series_name] = {"next_num": 1, "files": []}
+            self.series[series_name] = {"next_num": 1, "files": deque(maxlen=3)}  # only the last 3 are ever shown, so only 3 are kept
         num = self.series[series_name]["next_num"]
         self.series[series_name]["files"].append(str(file_path))
         self.series[series_name]["next_num"] += 1
         return num
 
     def get_series_info(self):
-        return {k: {"count": len(v["files"]), "files": v["files"][-3:]}
-                for k, v in self.series.items()}
+        return {k: {"count": v["next_num"] - 1, "files": list(v["files"])}  # next_num - 1 is how many were registered
+                for k, v in list(self.series.items())}  # copy first: the prefetch thread may read this while a file is being registered
 
 
 class CategoryTracker:
@@ -334,13 +516,25 @@ class CategoryTracker:
     def __init__(self):
         self.categories_file = PROJECT_ROOT / "categories.json"
         self.categories = self._load_categories()
+        self._normalized_index = None  # built on first use, thrown away when a category is added
+        self._prompt_prefix = None  # academic + general part of the prompt; those lists never change during a run
+        self._timings = {k: tuple(v) for k, v in self.categories.get("timings", {}).items()}  # tuples made once, not per lookup
+        self._refresh()
+
+    def _refresh(self):
+        """Rebuild the combined list, its set and the prompt text after the categories change."""
+        # New objects instead of editing in place, so the prefetch thread never sees a half-updated list
+        self._all_list = (self.categories.get("academic", []) +
+                          self.categories.get("general", []) +
+                          self.categories.get("custom", []))
+        self._all_set = frozenset(self._all_list)  # quick "do we have this one?" check
+        self._prompt_str = None  # rebuilt the next time a prompt needs it
 
     def _load_categories(self):
         if self.categories_file.exists():
             try:
-                with open(self.categories_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
+                return jsonio.load_file(self.categories_file)
+            except (ValueError, IOError):
                 pass
         return {
             "academic": ["PHIL-TR013", "SOC-TR011", "WGST-TR000", "CS111", "GER101", "GER102",
@@ -387,37 +581,51 @@ class CategoryTracker:
 
     def _save_categories(self):
         try:
-            with open(self.categories_file, 'w') as f:
-                json.dump(self.categories, f, indent=2)
-        except IOError as e:
+            jsonio.write_file(self.categories_file, self.categories)
+        except (IOError, TypeError) as e:
             console.print(f"[dim]Warning: Could not save categories: {e}[/dim]")
 
     def add_category(self, category):
         category = category.strip()
-        all_existing = self.get_all_categories()
-        if category and category not in all_existing:
+        if category and category not in self._all_set:
             self.categories["custom"].append(category)
+            self._normalized_index = None  # the list changed, so rebuild the lookup next time
+            self._refresh()
             self._save_categories()
             return True
         return False
 
     def get_all_categories(self):
-        return (self.categories.get("academic", []) +
-                self.categories.get("general", []) +
-                self.categories.get("custom", []))
+        return self._all_list  # shared list - read it, don't change it
+
+    def get_normalized_index(self):
+        """Return ({lowercase name: category}, [(category, lowercase, squashed)]) for fast folder-name matching"""
+        if self._normalized_index is None:
+            exact = {}
+            fuzzy = []
+            for cat in self.get_all_categories():
+                cat_lower = cat.lower()
+                exact.setdefault(cat_lower, cat)  # keep the first one, like the old loop did
+                fuzzy.append((cat, cat_lower, cat_lower.replace('p', '').replace('-', '')))  # lowercase and squashed once, not per folder
+            self._normalized_index = (exact, fuzzy)
+        return self._normalized_index
 
     def get_timing_for_context(self, context):
-        timings = self.categories.get("timings", {})
-        if context in timings:
-            return tuple(timings[context])
-        return None
+        return self._timings.get(context)
 
     def get_categories_for_prompt(self):
-        academic = ", ".join(self.categories.get("academic", []))
-        general = ", ".join(self.categories.get("general", []))
-        custom = ", ".join(self.categories.get("custom", []))
-
-        result = f"ACADEMIC: {academic}\nGENERAL: {general}"
+        if self._prompt_str is None:
+            self._prompt_str = self._build_prompt_str()
+        return self._prompt_str
+
+    def _build_prompt_str(self):
+        if self._prompt_prefix is None:
+            academic = ", ".join(self.categories.get("academic", []))
+            general = ", ".join(self.categories.get("general", []))
+            self._prompt_prefix = f"ACADEMIC: {academic}\nGENERAL: {general}"
+        custom = ", ".join(self.categories.get("custom", []))  # add_category only ever changes this part
+
+        result = self._prompt_prefix
         if custom:
             result += f"\nUSER CUSTOM: {custom}"
         return result
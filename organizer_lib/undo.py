@@ -1,8 +1,9 @@
-import json
 import shutil
+import threading
 from pathlib import Path
 from rich.console import Console
 
+from . import jsonio
 from .config import PROJECT_ROOT
 
 console = Console()
@@ -12,37 +13,80 @@ class UndoHistory:
 
     def __init__(self):
         self.history_file = PROJECT_ROOT / "undo_history.json"
+        self.journal_file = PROJECT_ROOT / "current_session.ndjson"  # moves not yet in a saved session, one JSON object per line
+        self._journal = None  # opened the first time a move is recorded
+        self._lock = threading.Lock()  # record_move is called from the background move threads
         self.history = self._load_history()
         self.current_session_moves = []  # moves in current session only
+        leftover = self._load_journal()
+        if leftover:  # an earlier run was killed or crashed before it could save its session
+            self.current_session_moves = leftover
+            self.save_session(f"Recovered session - {len(leftover)} files")  # saved as its own session, so --undo can reverse it
 
     def _load_history(self):
         """Load undo history from disk"""
         if self.history_file.exists():
             try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
+                return jsonio.load_file(self.history_file)  # one read (or a memory map, for big files), then parse the bytes
+            except (ValueError, IOError):
                 pass
         return {"sessions": []}
 
+    def _load_journal(self):
+        """Moves recorded by a run that ended before save_session (written the moment each move finished)."""
+        moves = []
+        try:
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        moves.append(jsonio.loads(line))
+                    except ValueError:
+                        continue  # half-written line from a crash - skip it
+        except IOError:
+            pass
+        return moves
+
+    def _append_journal(self, move_record):
+        """Add one move to current_session.ndjson (one small write per move)."""
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'ab')
+            self._journal.write(jsonio.dumps(move_record) + b"\n")
+            self._journal.flush()  # hand it to the OS now, so a crash doesn't lose it
+        except (IOError, TypeError):
+            pass
+
+    def _clear_journal(self):
+        try:
+            if self._journal is not None:
+                self._journal.truncate(0)  # append mode keeps writing at the (new) end
+            elif self.journal_file.exists():
+                open(self.journal_file, 'w').close()
+        except IOError:
+            pass
+
     def _save_history(self):
         """Save undo history to disk"""
         try:
-            with open(self.history_file, 'w') as f:
-                json.dump(self.history, f, indent=2)
-        except IOError as e:
+            jsonio.write_file(self.history_file, self.history)  # swapped in all at once, so it's never half-written
+        except (IOError, TypeError) as e:
             console.print(f"[dim]Warning: Could not save undo history: {e}[/dim]")
+            return False
+        return True
 
-    def record_move(self, source_path, dest_path, action="moved"):
-        """Record a file move operation"""
+    def record_move(self, source_path, dest_path, action="moved", dest_mtime=None):
+        """Record a file move operation (dest_mtime: the moved file's mtime, if the caller knows it)"""
         move_record = {
             "source": str(source_path),
             "destination": str(dest_path),
             "action": action,  # "moved", "trashed", etc.
-            "timestamp": str(Path(dest_path).stat().st_mtime) if Path(dest_path).exists() else ""
         }
+        if dest_mtime is not None:
+            move_record["timestamp"] = dest_mtime  # passed in, so no stat of the new file; a number (seconds since 1970), not text
 
-        self.current_session_moves.append(move_record)
+        with self._lock:  # one move at a time, so journal lines never get mixed together
+            self.current_session_moves.append(move_record)
+            self._append_journal(move_record)
 
     def save_session(self, session_label=""):
         """Save current session moves to history"""
@@ -62,7 +106,8 @@ class UndoHistory:
         if len(self.history["sessions"]) > 10:
             self.history["sessions"] = self.history["sessions"][-10:]
 
-        self._save_history()
+        if self._save_history():
+            self._clear_journal()  # the moves are in undo_history.json now
         self.current_session_moves = []  # reset for next session
 
     def undo_last_session(self):
@@ -1,4 +1,8 @@
+import os
+import locale
 import datetime
+import functools
+import heapq
 import shutil
 import subprocess
 import pypdf
@@ -7,30 +11,46 @@ from PIL import Image
 from PIL.ExifTags import TAGS
 import io
 import base64
+from collections import defaultdict
+
+try:
+    import pyvips  # libvips: shrinks JPEGs while decoding them (optional)
+except (ImportError, OSError):
+    pyvips = None  # not installed, or the libvips library itself is missing - PIL does the thumbnails
 
 from .config import SUPPORTED_EXTENSIONS, NEIGHBOR_COUNT, IMAGE_EXTENSIONS
 
-def get_unique_path(folder, filename):
-    """Prevents overwriting by adding (1), (2), etc."""
+def get_unique_path(folder, filename, taken=()):
+    """Prevents overwriting by adding (1), (2), etc. (also skips names in taken, e.g. moves still in progress)"""
     path = folder / filename
-    if not path.exists():
+    if not path.exists() and path not in taken:
         return path
     
     stem = path.stem
     suffix = path.suffix
     counter = 1
-    while path.exists():
+    while path.exists() or path in taken:
         path = folder / f"{stem}({counter}){suffix}"
         counter += 1
     return path
 
 def get_season(date_obj):
-    month = date_obj.month
+    return get_season_from_month(date_obj.month)
+
+@functools.lru_cache(maxsize=12)
+def get_season_from_month(month):
+    """Season name for a month number (1-12); there are only 12 answers, so they're remembered."""
     if 3 <= month <= 5: return "Spring"
     elif 6 <= month <= 8: return "Summer"
     elif 9 <= month <= 11: return "Fall"
     return "Winter"
 
+@functools.lru_cache(maxsize=1024)
+def get_year_season(timestamp):
+    """Return (year, season) for a timestamp; remembered because many files share the same timestamp."""
+    date_obj = datetime.datetime.fromtimestamp(timestamp)
+    return date_obj.year, get_season(date_obj)
+
 def get_timestamp_for_season(year, season):
     """Convert year and season to a timestamp (middle of that season)."""
     season_months = {"Winter": 1, "Spring": 4, "Summer": 7, "Fall": 10}
@@ -41,27 +61,106 @@ def get_timestamp_for_season(year, season):
 def open_file_externally(file_path):
     """Opens file with default system application (non-blocking)."""
     try:
-        subprocess.run(["open", str(file_path)], check=False)
+        subprocess.Popen(
+            ["open", str(file_path)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,  # don't share our terminal
+            start_new_session=True,  # the viewer lives on its own; we don't wait for it
+        )
     except Exception:
         pass
 
-def get_file_metadata(file_path, include_neighbors=True):
-    """Extract file metadata including neighbors for context."""
+_SUPPORTED = frozenset(ext.lower() for ext in SUPPORTED_EXTENSIONS)  # fixed lowercase set, so "is it allowed?" is one quick lookup
+
+def _extension(name):
+    """Return the lowercased extension of a plain file name, like '.pdf', or '' if there is none."""
+    i = name.rfind('.')  # find the last dot without building a Path
+    return name[i:].lower() if i >= 0 else ''
+
+def scan_files(directory, recursive=False):
+    """Yield (path, stat, parent_dir) for every supported, non-hidden file, using a single stat per file."""
+    pending_dirs = [os.fspath(directory)]
+    while pending_dirs:
+        current = pending_dirs.pop()
+        try:
+            with os.scandir(current) as entries:  # scandir already knows file vs folder, so no extra checks
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending_dirs.append(entry.path)  # look inside it later
+                        continue
+                    name = entry.name
+                    if name.startswith('.') or _extension(name) not in _SUPPORTED:
+                        continue  # cheap name checks first, before touching the disk
+                    if entry.is_file(follow_symlinks=False):
+                        yield Path(entry.path), entry.stat(follow_symlinks=False), current  # this stat gets reused for sorting; current is the folder as a string
+        except OSError:
+            continue  # folder we can't read - skip it
+
+class StatCache(dict):
+    """Remembers os.stat results by path so each file is only stat'ed once per run."""
+
+    def get_or_stat(self, path):
+        key = os.fspath(path)
+        stats = self.get(key)
+        if stats is None:
+            stats = self[key] = os.stat(key)  # first time we see this file - ask the disk and keep the answer
+        return stats
+
+@functools.lru_cache(maxsize=128)
+def _list_dir_cached(parent, mtime_ns):
+    """First NEIGHBOR_COUNT + 1 names, sorted, of the supported, non-hidden files in a folder.
+
+    One more than needed, so a file in the list can drop itself and still have enough.
+    mtime_ns is only part of the cache key.
+    """
+    with os.scandir(parent) as entries:
+        names = (
+            e.name for e in entries
+            if not e.name.startswith('.')
+            and _extension(e.name) in _SUPPORTED  # same quick check the scanner uses
+            and e.is_file()  # scandir already knows the type, so usually no stat
+        )
+        return tuple(heapq.nsmallest(NEIGHBOR_COUNT + 1, names))  # keeps only a few names as it goes - no full list, no full sort
+
+def is_screenshot(stem):
+    """True for names like 'Screenshot 2024-...' / 'Screen Shot ...' - these never go to the vision model."""
+    stem = stem.lower()
+    return "screenshot" in stem or "screen shot" in stem
+
+def sibling_listings(paths):
+    """{folder: first NEIGHBOR_COUNT + 1 sorted names} for files we already know about (e.g. from scan_files).
+
+    Pass a folder's entry to get_file_metadata as siblings_override to skip listing that folder again.
+    """
+    by_folder = defaultdict(list)
+    for path in paths:
+        by_folder[os.fspath(path.parent)].append(path.name)
+    return {folder: tuple(heapq.nsmallest(NEIGHBOR_COUNT + 1, names)) for folder, names in by_folder.items()}
+
+def get_file_metadata(file_path, include_neighbors=True, stat_cache=None, meta_cache=None, include_image_b64=True, siblings_override=None):
+    """Extract file metadata including neighbors for context.
+
+    With include_image_b64=False, images get their EXIF but no thumbnail ("image_base64" stays None).
+    siblings_override: sorted names in the file's folder (see sibling_listings), used instead of reading the folder.
+    """
     try:
-        stats = file_path.stat()
+        stats = stat_cache.get_or_stat(file_path) if stat_cache is not None else file_path.stat()  # reuse the scan's stat if we have it
     except FileNotFoundError:
         return None
         
     created_dt = datetime.datetime.fromtimestamp(stats.st_ctime)
+    parent = file_path.parent  # Path makes a new object on every .parent, so get it once
+    folder_path = os.fspath(parent)  # used for folder_path and the neighbor lookup
     meta = {
         "filename": file_path.name,
         "original_stem": file_path.stem,
         "extension": file_path.suffix.lower(),
         "size": stats.st_size,
         "created": stats.st_ctime,
+        "modified": stats.st_mtime,  # a move keeps this, so it's also the moved file's mtime (used for undo)
         "created_date": created_dt.strftime("%Y-%m-%d"),
-        "folder_name": file_path.parent.name,
-        "folder_path": str(file_path.parent),
+        "folder_name": parent.name,
+        "folder_path": folder_path,
         "content_preview": "No preview available",
         "exif": {},
         "neighboring_files": [],
@@ -70,26 +169,82 @@ def get_file_metadata(file_path, include_neighbors=True):
 
     if include_neighbors:
         try:
-            siblings = [
-                f.name for f in file_path.parent.iterdir()
-                if f.is_file()
-                and not f.name.startswith('.')
-                and f.suffix.lower() in SUPPORTED_EXTENSIONS
-                and f.name != file_path.name
-            ]
-            siblings.sort()
-            meta["neighboring_files"] = siblings[:NEIGHBOR_COUNT]
+            if siblings_override is not None:
+                listing = siblings_override  # the caller already knows what's in the folder - no disk access at all
+            else:
+                listing = _list_dir_cached(folder_path, os.stat(folder_path).st_mtime_ns)  # adding or removing a file changes the folder's mtime, so stale lists are never reused
+            meta["neighboring_files"] = [name for name in listing if name != file_path.name][:NEIGHBOR_COUNT]  # listing has one extra in case this file is in it
         except Exception:
             pass
 
+    cached = meta_cache.get(file_path, stats) if meta_cache is not None else None
+    if cached is not None:
+        meta.update(cached)  # file hasn't changed since last run - skip opening it
+        return meta
+
+    _read_content(file_path, meta, include_image_b64)
+    if meta_cache is not None:
+        meta_cache.put(file_path, stats, meta)  # remember it for next time (thumbnails aren't saved, so skipping one changes nothing)
+    return meta
+
+_TEXT_ENCODING = locale.getpreferredencoding(False)  # what open() would use by default
+
+def _read_text_preview(file_path, chars):
+    """First `chars` characters of a text file, read with one raw read instead of a buffered text stream."""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        data = os.read(fd, chars * 4)  # 4 bytes covers even the widest UTF-8 character
+    finally:
+        os.close(fd)
+    text = data.decode(_TEXT_ENCODING, errors='ignore')
+    return text.replace('\r\n', '\n').replace('\r', '\n')[:chars]  # same newlines text mode would give
+
+def _pdf_preview(file_path):
+    """First-page text of a PDF, or None if it has no pages."""
+    with open(file_path, 'rb') as f:  # given an open file, pypdf reads only the parts it needs; given a path, it copies the whole file into memory first
+        reader = pypdf.PdfReader(f)
+        try:
+            first_page = reader.pages[0]
+        except IndexError:
+            return None  # a PDF with no pages
+        return first_page.extract_text()[:500]
+
+def _thumbnail_jpeg(file_path, img, max_dim=1024):
+    """JPEG data (bytes or a memoryview) of the image shrunk to fit max_dim, via libvips when available, else the open PIL img."""
+    if pyvips is not None:
+        try:
+            thumb = pyvips.Image.thumbnail(os.fspath(file_path), max_dim, size='down')  # never upscales, like the PIL path
+            if thumb.hasalpha():
+                thumb = thumb.flatten()  # JPEG has no transparency
+            return thumb.jpegsave_buffer(Q=85)
+        except pyvips.Error:
+            pass  # a format this libvips build can't read - let PIL do it
+
+    # thumbnail() shrinks in place and does nothing to small images. Because the pixels haven't been
+    # loaded yet, it first asks the JPEG decoder (draft) to decode at 1/2, 1/4 or 1/8 size
+    img.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+
+    if img.mode in ('RGBA', 'P'):
+        img = img.convert('RGB')
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=85)
+    return buffer.getbuffer()  # a view of the buffer's bytes, not a copy - b64encode reads it directly
+
+def load_thumbnail(file_path):
+    """Base64 JPEG thumbnail of an image file, for metadata whose thumbnail was skipped or already dropped."""
+    with Image.open(file_path) as img:
+        return base64.b64encode(_thumbnail_jpeg(file_path, img))
+
+def _read_content(file_path, meta, include_image_b64=True):
+    """Fill in the preview, EXIF and thumbnail - the slow part of get_file_metadata."""
     try:
         if meta["extension"] == '.pdf':
-            reader = pypdf.PdfReader(file_path)
-            if len(reader.pages) > 0:
-                meta["content_preview"] = reader.pages[0].extract_text()[:500]
+            preview = _pdf_preview(file_path)
+            if preview is not None:
+                meta["content_preview"] = preview
         elif meta["extension"] in {'.txt', '.md', '.csv'}:
-            with open(file_path, 'r', errors='ignore') as f:
-                meta["content_preview"] = f.read(500)
+            meta["content_preview"] = _read_text_preview(file_path, 500)
         elif meta["extension"] in IMAGE_EXTENSIONS:
             with Image.open(file_path) as img:
                 exif_data = img.getexif()
@@ -99,19 +254,7 @@ def get_file_metadata(file_path, include_neighbors=True):
                         if tag in ['Make', 'Model', 'DateTime', 'DateTimeOriginal', 'GPSInfo', 'ImageDescription']:
                             meta["exif"][tag] = str(value)[:100]
 
-                max_dim = 1024
-                if max(img.size) > max_dim:
-                    ratio = max_dim / max(img.size)
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-
-                buffer = io.BytesIO()
-                img.save(buffer, format="JPEG", quality=85)
-                meta["image_base64"] = base64.b64encode(buffer.getvalue()).decode('utf-8')
+                if include_image_b64:
+                    meta["image_base64"] = base64.b64encode(_thumbnail_jpeg(file_path, img))  # kept as bytes; it's only turned into text when the request is sent
     except Exception:
         pass
-        
-    return meta
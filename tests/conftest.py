@@ -0,0 +1,13 @@
+import pytest
+
+from organizer_lib import ai_handler, cache, trackers, undo
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """Point every module that keeps files in PROJECT_ROOT at a fresh temp folder."""
+    for module in (trackers, undo, cache):
+        monkeypatch.setattr(module, "PROJECT_ROOT", tmp_path)
+    ai_handler._get_ai_cache.cache_clear()  # the next AICache opens in tmp_path
+    yield tmp_path
+    ai_handler._get_ai_cache.cache_clear()
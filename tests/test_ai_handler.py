@@ -0,0 +1,76 @@
+from organizer_lib import ai_handler
+
+
+def _meta(i):
+    return {
+        "filename": f"file{i}.txt",
+        "original_stem": f"file{i}",
+        "extension": ".txt",
+        "size": 100 + i,
+        "folder_name": "Downloads",
+        "content_preview": f"preview {i}",
+    }
+
+
+def test_failed_chunk_keeps_other_chunks_results(state_dir, monkeypatch):
+    metas = [_meta(i) for i in range(30)]  # enough files for several chunks
+    chunks = ai_handler._chunk_by_output_tokens(metas)
+    assert len(chunks) >= 2
+
+    def fake_call(client, prompt):
+        if "file0.txt" in prompt:
+            return None  # the first chunk fails
+        count = prompt.count("Original Filename:")
+        return [{"context": "Work", "description": "doc", "confidence": 0.5}] * count
+
+    monkeypatch.setattr(ai_handler, "GROQ_KEY", "test-key")
+    monkeypatch.setattr(ai_handler, "_get_client", lambda: None)
+    monkeypatch.setattr(ai_handler, "_call_text", fake_call)
+
+    results = ai_handler.analyze_files_with_ai(metas)
+
+    assert len(results) == len(metas)
+    failed = set(chunks[0])
+    for i, result in enumerate(results):
+        if i in failed:
+            assert result is None
+        else:
+            assert result["context"] == "Work"
+
+
+def test_missing_key_keeps_cached_results(state_dir, monkeypatch):
+    metas = [_meta(0), _meta(1)]
+    ai_handler._get_ai_cache().set(metas[0], {"context": "Finance", "description": "x", "confidence": 0.9})
+    monkeypatch.setattr(ai_handler, "GROQ_KEY", None)
+
+    results = ai_handler.analyze_files_with_ai(metas)
+
+    assert results[0]["context"] == "Finance"
+    assert results[1] is None
+
+
+def _image_meta(i):
+    meta = _meta(i)
+    meta.update(filename=f"photo{i}.jpg", original_stem=f"photo{i}", extension=".jpg", image_base64=b"aGVsbG8=")
+    return meta
+
+
+def test_thumbnails_dropped_when_everything_is_cached(state_dir):
+    meta = _image_meta(0)
+    ai_cache = ai_handler._get_ai_cache()
+    ai_cache.set(meta, {"context": "Photos", "description": "x", "confidence": 0.9})
+
+    results = ai_handler.analyze_files_with_ai([meta])
+
+    assert results[0]["context"] == "Photos"
+    assert "image_base64" not in meta
+    assert "image_sha256" in meta
+
+
+def test_thumbnails_dropped_without_api_key(state_dir, monkeypatch):
+    monkeypatch.setattr(ai_handler, "GROQ_KEY", None)
+    meta = _image_meta(1)
+
+    assert ai_handler.analyze_files_with_ai([meta]) == [None]
+    assert "image_base64" not in meta
+    assert "image_sha256" in meta
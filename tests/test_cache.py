@@ -0,0 +1,96 @@
+import sqlite3
+import time
+
+from PIL import Image
+
+from organizer_lib import ai_handler
+from organizer_lib.cache import AICache, MetadataCache
+from organizer_lib.mover import MoveQueue, move_file
+from organizer_lib.utils import get_file_metadata
+
+
+def _photo(folder, name="photo.jpg"):
+    path = folder / name
+    Image.new("RGB", (64, 64), "red").save(path)
+    return path
+
+
+def test_saved_metadata_has_fingerprint_but_no_thumbnail(state_dir):
+    path = _photo(state_dir)
+    meta_cache = MetadataCache()
+    fresh = get_file_metadata(path, meta_cache=meta_cache)
+    assert fresh["image_base64"]
+    meta_cache.flush()
+
+    cached = get_file_metadata(path, meta_cache=MetadataCache())
+    assert cached["image_base64"] is None
+    ai_handler.drop_thumbnail(fresh)
+    assert cached["image_sha256"] == fresh["image_sha256"]
+    row = sqlite3.connect(state_dir / "meta_cache.db").execute("SELECT * FROM content").fetchone()
+    assert len(row) == 5 and b"image_base64" not in row[3]  # path, size, mtime_ns, fields, seen - no thumbnail anywhere
+
+
+def test_vision_step_remakes_a_dropped_thumbnail(state_dir, monkeypatch):
+    path = _photo(state_dir)
+    meta = get_file_metadata(path)
+    ai_handler.drop_thumbnail(meta)
+    looked_at = []
+
+    def fake_vision(meta, client):
+        looked_at.append(meta["image_base64"])
+        return "a red square"
+
+    monkeypatch.setattr(ai_handler, "GROQ_KEY", "test-key")
+    monkeypatch.setattr(ai_handler, "_get_client", lambda: None)
+    monkeypatch.setattr(ai_handler, "analyze_image_with_vision", fake_vision)
+    monkeypatch.setattr(ai_handler, "_call_text", lambda client, prompt: None)
+
+    ai_handler.analyze_files_with_ai([meta])
+
+    assert looked_at and looked_at[0]
+    assert ai_handler._get_ai_cache().get_vision(meta["image_sha256"]) == "a red square"
+    assert "image_base64" not in meta
+
+
+def test_row_follows_a_moved_file(state_dir):
+    (state_dir / "in").mkdir()
+    (state_dir / "out").mkdir()
+    path = _photo(state_dir / "in")
+    meta_cache = MetadataCache()
+    get_file_metadata(path, meta_cache=meta_cache)
+    meta_cache.flush()  # saved under the old path
+
+    with MoveQueue(on_moved=meta_cache.moved) as move_queue:
+        final_path = move_file(path, state_dir / "out", "photo.jpg", move_queue)
+    meta_cache.flush()
+
+    reopened = MetadataCache()
+    assert reopened.get(path, final_path.stat()) is None
+    assert reopened.get(final_path, final_path.stat()) is not None
+
+
+def test_rows_not_seen_for_a_while_are_dropped(state_dir):
+    path = _photo(state_dir)
+    meta_cache = MetadataCache()
+    get_file_metadata(path, meta_cache=meta_cache)
+    meta_cache.flush()
+    old = time.time() - 31 * 86400
+    meta_cache.db.execute("UPDATE content SET seen=?", (old,))
+
+    assert MetadataCache().get(path, path.stat()) is None
+
+
+def test_vision_rows_age_out_unless_used(state_dir):
+    ai_cache = AICache()
+    ai_cache.set_vision("used", "a cat")
+    ai_cache.set_vision("unused", "a dog")
+    ai_cache.flush()
+    old = time.time() - 31 * 86400
+    ai_cache.db.execute("UPDATE vision SET ts=?", (old,))
+
+    assert ai_cache.get_vision("used") == "a cat"
+    ai_cache.flush()  # the lookup moves its ts up
+
+    reopened = AICache()
+    assert reopened.get_vision("used") == "a cat"
+    assert reopened.get_vision("unused") is None
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer_lib import ai_handler, main
+from organizer_lib.main import prefetch
+
+
+def test_quitting_stops_the_prefetched_load():
+    started = threading.Event()
+    release = threading.Event()
+    asked_ai = []
+
+    def load(item, stop):
+        if item == 2:
+            started.set()
+            release.wait(5)  # still reading metadata when the user quits
+        if not stop.is_set():
+            asked_ai.append(item)
+        return item
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for item in prefetch([1, 2, 3], load, executor, str):
+            assert started.wait(5)  # item 2 is loading in the background
+            break  # the user quit while reviewing item 1
+        release.set()
+
+    assert asked_ai == [1]  # item 2 skipped its AI request and item 3 never started
+
+
+def test_quitting_cancels_a_load_that_has_not_started():
+    loaded = []
+    gate = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        def load(item, stop):
+            loaded.append(item)
+            if item == 1:
+                executor.submit(gate.wait, 5)  # keeps the only worker busy, so item 2 waits in line
+            return item
+
+        results = prefetch([1, 2], load, executor, str)
+        assert next(results) == 1
+        results.close()  # the user quit
+        gate.set()
+
+    assert loaded == [1]
+
+
+def test_quitting_a_folder_still_reviews_the_loose_files(state_dir, tmp_path, monkeypatch):
+    scan_dir = tmp_path / "scan"
+    for folder in ("a", "b"):
+        (scan_dir / folder).mkdir(parents=True)
+        for i in range(100):  # more than the read-ahead, so the second folder isn't fully queued yet
+            (scan_dir / folder / f"{folder}{i}.txt").write_text("x")
+    for name in ("loose1.txt", "loose2.txt"):
+        (scan_dir / name).write_text("x")
+    reviewed = []
+
+    def fake_review_file(file_path, *args, **kwargs):
+        reviewed.append(file_path.name)
+        return True, "skipped"
+
+    monkeypatch.setattr(ai_handler, "GROQ_KEY", None)
+    monkeypatch.setattr(main, "review_folder_batch", lambda *args: ("quit", None, None))  # quit in the first folder
+    monkeypatch.setattr(main, "review_single_file", fake_review_file)
+
+    main.process_files(scan_dir, recursive=True, folder_mode=True, dry_run=True)
+
+    assert sorted(reviewed) == ["loose1.txt", "loose2.txt"]
@@ -0,0 +1,39 @@
+import threading
+
+from organizer_lib.mover import MoveQueue, move_file
+
+
+def test_finished_moves_are_handled_before_the_queue_closes(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("a")
+    dest_folder = tmp_path / "out"
+    dest_folder.mkdir()
+    done = threading.Event()
+    recorded = []
+
+    def on_done(src, dst):
+        recorded.append((src, dst))
+        done.set()
+
+    with MoveQueue() as move_queue:
+        final_path = move_file(source, dest_folder, "b.txt", move_queue, on_done=on_done)
+        assert done.wait(5)  # ran as soon as the move finished, not at shutdown
+        assert recorded == [(source, final_path)]
+        move_queue.wait()
+        assert not move_queue._pending  # nothing kept around for the rest of the run
+    assert final_path.read_text() == "a"
+
+
+def test_failed_move_is_reported_by_poll(tmp_path):
+    missing = tmp_path / "gone.txt"
+    dest_folder = tmp_path / "out"
+    dest_folder.mkdir()
+    recorded = []
+
+    with MoveQueue() as move_queue:
+        move_file(missing, dest_folder, "x.txt", move_queue, on_done=lambda s, d: recorded.append(s), label="trashed")
+        assert move_queue.wait() == 1
+        assert move_queue.failed["trashed"] == 1
+        assert [src for src, _ in move_queue.errors] == [missing]
+        assert move_queue.poll() == 0  # each failure is reported once
+    assert recorded == []  # on_done only runs for moves that worked
@@ -0,0 +1,33 @@
+import signal
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = textwrap.dedent("""
+    import os, signal, sys, time
+    from pathlib import Path
+    from organizer_lib import cache, main
+    cache.PROJECT_ROOT = Path(sys.argv[1])
+    ai_cache = cache.AICache()
+    ai_cache.set({"filename": "a.pdf", "original_stem": "a", "extension": ".pdf"}, {"context": "Work"})  # queued, not written yet
+    main.install_exit_handlers()
+    os.kill(os.getpid(), getattr(signal, sys.argv[2]))
+    time.sleep(5)
+""")
+
+
+@pytest.mark.parametrize("sig", ["SIGTERM", "SIGHUP"])
+def test_signal_runs_atexit_saves(tmp_path, sig):
+    if not hasattr(signal, sig):
+        pytest.skip(f"{sig} not available")
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(tmp_path), sig], cwd=REPO_ROOT, capture_output=True, timeout=30)
+
+    assert proc.returncode == 128 + getattr(signal, sig)
+    with sqlite3.connect(tmp_path / "ai_cache.db") as db:
+        assert db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
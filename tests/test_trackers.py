@@ -0,0 +1,123 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from organizer_lib import jsonio, trackers
+from organizer_lib.trackers import MemoryTracker
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Flushes, makes two more corrections, then quits without running atexit (like a crash)
+CHILD = textwrap.dedent("""
+    import os, sys
+    from pathlib import Path
+    from organizer_lib import trackers
+    trackers.PROJECT_ROOT = Path(sys.argv[1])
+    tracker = trackers.MemoryTracker()
+    meta = {"filename": "a.pdf", "folder_name": "Downloads", "extension": ".pdf", "content_preview": ""}
+    tracker.record_correction(meta, "Misc", "Finance", "context")
+    tracker.flush()
+    tracker.record_correction(meta, "Misc", "Finance", "context")
+    tracker.record_correction(meta, "Misc", "Work", "context")
+    os._exit(0)  # skips atexit, so the durable flush never happens
+""")
+
+
+def _correct(tracker, choice, folder="Downloads"):
+    meta = {"filename": "a.pdf", "folder_name": folder, "extension": ".pdf", "content_preview": ""}
+    tracker.record_correction(meta, "Misc", choice, "context")
+
+
+def _log_lines(state_dir):
+    return [jsonio.loads(line) for line in (state_dir / "memory.jsonl").read_bytes().splitlines()]
+
+
+def test_best_folder_pattern_tie_matches_after_reload(state_dir):
+    tracker = MemoryTracker()
+    for choice in ("A", "B", "B", "A"):
+        _correct(tracker, choice)
+    assert tracker.get_best_folder_pattern("Downloads") == ("A", 2)  # tied - the one picked first wins
+
+    tracker.flush(durable=True)
+    assert MemoryTracker().get_best_folder_pattern("Downloads") == ("A", 2)
+
+
+def test_incremental_top_3_matches_a_rebuild(state_dir):
+    tracker = MemoryTracker()
+    choices = "ABCDBCADDEEACBEF"
+    for choice in choices:
+        _correct(tracker, choice)
+    in_session = tracker._top_patterns["folder_patterns"]["Downloads"]
+
+    tracker.flush(durable=True)
+    assert MemoryTracker()._top_patterns["folder_patterns"]["Downloads"] == in_session
+
+
+def test_corrections_are_appended_and_replayed(state_dir):
+    tracker = MemoryTracker()
+    _correct(tracker, "Finance")
+    _correct(tracker, "Work")
+    assert [entry["user_chose"] for entry in _log_lines(state_dir)] == ["Finance", "Work"]
+    assert not (state_dir / "memory.json").exists()  # nothing flushed yet
+
+    reloaded = MemoryTracker()  # the first tracker never flushed - only the log has the corrections
+    assert reloaded.memory["stats"]["corrections_made"] == 2
+    assert reloaded.memory["folder_patterns"]["Downloads"] == {"Finance": 1, "Work": 1}
+
+
+def test_replay_skips_lines_memory_json_already_has(state_dir):
+    tracker = MemoryTracker()
+    _correct(tracker, "Finance")
+    tracker.flush()  # not durable, so the log keeps its line
+    assert len(_log_lines(state_dir)) == 1
+    assert jsonio.load_file(state_dir / "memory.json")["log_through"] == tracker.memory["corrections"][-1]["timestamp"]
+
+    reloaded = MemoryTracker()
+    assert reloaded.memory["stats"]["corrections_made"] == 1  # not counted twice
+    assert reloaded.memory["folder_patterns"]["Downloads"] == {"Finance": 1}
+
+
+def test_flush_resets_the_clock(state_dir):
+    tracker = MemoryTracker()
+    _correct(tracker, "Finance")
+    tracker.flush()
+    assert tracker._clock == (None, 0.0)
+    _correct(tracker, "Work")
+    assert tracker.memory["corrections"][-1]["timestamp"] > tracker.memory["log_through"]
+
+
+def test_correction_right_after_a_durable_flush_is_replayed(state_dir):
+    tracker = MemoryTracker()
+    _correct(tracker, "Finance")
+    tracker.flush(durable=True)
+    assert (state_dir / "memory.jsonl").read_bytes() == b""
+    _correct(tracker, "Work")  # same second as the flush
+
+    reloaded = MemoryTracker()
+    assert reloaded.memory["stats"]["corrections_made"] == 2
+    assert reloaded.memory["folder_patterns"]["Downloads"] == {"Finance": 1, "Work": 1}
+
+
+def test_big_log_is_compacted(state_dir, monkeypatch):
+    assert trackers.LOG_COMPACT_BYTES == 1024 * 1024
+    monkeypatch.setattr(trackers, "LOG_COMPACT_BYTES", 2048)  # same check, without writing a megabyte
+    tracker = MemoryTracker()
+    while not (state_dir / "memory.json").exists():
+        _correct(tracker, "Finance")
+    assert (state_dir / "memory.jsonl").read_bytes() == b""  # folded into memory.json and emptied
+    made = tracker.memory["stats"]["corrections_made"]
+    assert jsonio.load_file(state_dir / "memory.json")["stats"]["corrections_made"] == made
+
+    _correct(tracker, "Finance")
+    assert MemoryTracker().memory["stats"]["corrections_made"] == made + 1
+
+
+def test_flush_then_crash_reloads_exact_counts(state_dir):
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(state_dir)], cwd=REPO_ROOT, capture_output=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+
+    reloaded = MemoryTracker()
+    assert reloaded.memory["stats"]["corrections_made"] == 3
+    assert reloaded.memory["folder_patterns"]["Downloads"] == {"Finance": 2, "Work": 1}
+    assert reloaded.get_best_folder_pattern("Downloads") == ("Finance", 2)
@@ -0,0 +1,57 @@
+import signal
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from organizer_lib.undo import UndoHistory
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Moves files through the real MoveQueue + record_move, then dies without any cleanup (no save_session, no atexit)
+CHILD = textwrap.dedent("""
+    import os, signal, sys
+    from pathlib import Path
+    from organizer_lib import undo
+    from organizer_lib.mover import MoveQueue, move_file
+    root = Path(sys.argv[1])
+    undo.PROJECT_ROOT = root
+    history = undo.UndoHistory()
+    move_queue = MoveQueue()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        move_file(root / "in" / name, root / "out", name, move_queue, on_done=history.record_move)
+    move_queue.wait()  # all three files are in out/ now
+    os.kill(os.getpid(), signal.SIGKILL)  # killed mid-run, before the session is saved
+""")
+
+
+def test_moves_survive_a_kill_and_can_be_undone(state_dir):
+    (state_dir / "in").mkdir()
+    (state_dir / "out").mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (state_dir / "in" / name).write_text(name)
+
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(state_dir)], cwd=REPO_ROOT, capture_output=True, timeout=30)
+    assert proc.returncode == -signal.SIGKILL
+    assert sorted(p.name for p in (state_dir / "out").iterdir()) == ["a.txt", "b.txt", "c.txt"]
+
+    history = UndoHistory()  # the next run replays the journal
+    last = history.history["sessions"][-1]
+    assert last["label"] == "Recovered session - 3 files"
+    assert sorted(Path(m["source"]).name for m in last["moves"]) == ["a.txt", "b.txt", "c.txt"]
+    assert history.current_session_moves == []
+    assert (state_dir / "current_session.ndjson").stat().st_size == 0  # replayed once, not again next time
+
+    assert history.undo_last_session()
+    assert sorted(p.name for p in (state_dir / "in").iterdir()) == ["a.txt", "b.txt", "c.txt"]
+    assert len(UndoHistory().history["sessions"]) == 0
+
+
+def test_saved_session_clears_the_journal(state_dir):
+    history = UndoHistory()
+    history.record_move(state_dir / "x", state_dir / "y", dest_mtime=1.5)
+    history.save_session("run")
+
+    reloaded = UndoHistory()
+    assert [s["label"] for s in reloaded.history["sessions"]] == ["run"]
+    assert reloaded.history["sessions"][0]["moves"][0]["timestamp"] == 1.5